@@ -0,0 +1,61 @@
+"""Lowercase trigram indexes
+
+Revision ID: 3f8a6c2e9d41
+Revises: 9c4e1d7a2b3f
+Create Date: 2026-10-14 19:05:47.281936
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "3f8a6c2e9d41"
+down_revision: Union[str, None] = "9c4e1d7a2b3f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.drop_index("ix_post_title_trgm", table_name="post", postgresql_using="gin")
+    op.drop_index("ix_post_content_trgm", table_name="post", postgresql_using="gin")
+    op.create_index(
+        "ix_post_content_trgm",
+        "post",
+        [sa.text("lower(content) gin_trgm_ops")],
+        unique=False,
+        postgresql_using="gin",
+    )
+    op.create_index(
+        "ix_post_title_trgm",
+        "post",
+        [sa.text("lower(title) gin_trgm_ops")],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_post_title_trgm", table_name="post", postgresql_using="gin")
+    op.drop_index("ix_post_content_trgm", table_name="post", postgresql_using="gin")
+    op.create_index(
+        "ix_post_content_trgm",
+        "post",
+        ["content"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"content": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_post_title_trgm",
+        "post",
+        ["title"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"title": "gin_trgm_ops"},
+    )
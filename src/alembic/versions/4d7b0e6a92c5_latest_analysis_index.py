@@ -0,0 +1,33 @@
+"""Latest analysis index
+
+Revision ID: 4d7b0e6a92c5
+Revises: e1a94c3b7f25
+Create Date: 2026-10-14 21:52:08.316482
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "4d7b0e6a92c5"
+down_revision: Union[str, None] = "e1a94c3b7f25"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_postanalysis_latest",
+        "postanalysis",
+        ["post_id", "analysis_type", sa.text("created_at DESC")],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_postanalysis_latest", table_name="postanalysis")
@@ -0,0 +1,42 @@
+"""Category filter indexes
+
+Revision ID: 7a3f5c1e8b64
+Revises: 4d7b0e6a92c5
+Create Date: 2026-10-14 23:18:41.572903
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "7a3f5c1e8b64"
+down_revision: Union[str, None] = "4d7b0e6a92c5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Fails if existing names only differ in case, they must be renamed first
+    op.create_index(
+        "ix_category_name_lower",
+        "category",
+        [sa.text("lower(name)")],
+        unique=True,
+    )
+    op.drop_index(op.f("ix_category_name"), table_name="category")
+
+    op.create_index(
+        "ix_post_category_id_id", "post", ["category_id", "id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_post_category_id_id", table_name="post")
+
+    op.create_index(op.f("ix_category_name"), "category", ["name"], unique=True)
+    op.drop_index("ix_category_name_lower", table_name="category")
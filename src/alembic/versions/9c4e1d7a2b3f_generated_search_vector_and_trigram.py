@@ -0,0 +1,95 @@
+"""Generated search vector and trigram indexes
+
+Revision ID: 9c4e1d7a2b3f
+Revises: 52371bbfb15a
+Create Date: 2026-10-14 18:30:12.417305
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "9c4e1d7a2b3f"
+down_revision: Union[str, None] = "52371bbfb15a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SEARCH_VECTOR_EXPRESSION = (
+    "to_tsvector('russian', coalesce(title, '') || ' ' || content)"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # An existing column cannot be turned into a generated one, so recreate it
+    op.drop_index(
+        "ix_post_search_vector_gin", table_name="post", postgresql_using="gin"
+    )
+    op.drop_index(op.f("ix_post_search_vector"), table_name="post")
+    op.drop_column("post", "search_vector")
+    op.add_column(
+        "post",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(SEARCH_VECTOR_EXPRESSION, persisted=True),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "ix_post_search_vector_gin",
+        "post",
+        ["search_vector"],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+    # Trigram indexes for the ILIKE search path
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_post_content_trgm",
+        "post",
+        ["content"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"content": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_post_title_trgm",
+        "post",
+        ["title"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"title": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_post_title_trgm", table_name="post", postgresql_using="gin")
+    op.drop_index("ix_post_content_trgm", table_name="post", postgresql_using="gin")
+
+    op.drop_index(
+        "ix_post_search_vector_gin", table_name="post", postgresql_using="gin"
+    )
+    op.drop_column("post", "search_vector")
+    op.add_column(
+        "post",
+        sa.Column("search_vector", postgresql.TSVECTOR(), nullable=True),
+    )
+    op.execute(f"UPDATE post SET search_vector = {SEARCH_VECTOR_EXPRESSION}")
+    op.create_index(
+        op.f("ix_post_search_vector"), "post", ["search_vector"], unique=False
+    )
+    op.create_index(
+        "ix_post_search_vector_gin",
+        "post",
+        ["search_vector"],
+        unique=False,
+        postgresql_using="gin",
+    )
@@ -0,0 +1,48 @@
+"""Server side timestamps
+
+Revision ID: b7d2e5f40a18
+Revises: 3f8a6c2e9d41
+Create Date: 2026-10-14 19:42:03.518460
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "b7d2e5f40a18"
+down_revision: Union[str, None] = "3f8a6c2e9d41"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ("category", "post", "postanalysis")
+TIMESTAMP_COLUMNS = ("created_at", "updated_at")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        for column in TIMESTAMP_COLUMNS:
+            op.alter_column(
+                table,
+                column,
+                existing_type=sa.DateTime(),
+                existing_nullable=False,
+                server_default=sa.text("timezone('UTC', now())"),
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        for column in TIMESTAMP_COLUMNS:
+            op.alter_column(
+                table,
+                column,
+                existing_type=sa.DateTime(),
+                existing_nullable=False,
+                server_default=None,
+            )
@@ -0,0 +1,31 @@
+"""Analysis content hash
+
+Revision ID: c5e8a2d17f39
+Revises: 7a3f5c1e8b64
+Create Date: 2026-10-14 23:52:07.318264
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "c5e8a2d17f39"
+down_revision: Union[str, None] = "7a3f5c1e8b64"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing analyses have no hash and are run again on next request
+    op.add_column(
+        "postanalysis", sa.Column("content_hash", sa.LargeBinary(), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("postanalysis", "content_hash")
@@ -0,0 +1,43 @@
+"""JSONB analysis result
+
+Revision ID: e1a94c3b7f25
+Revises: b7d2e5f40a18
+Create Date: 2026-10-14 20:37:26.904173
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "e1a94c3b7f25"
+down_revision: Union[str, None] = "b7d2e5f40a18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column(
+        "postanalysis",
+        "result",
+        existing_type=sa.Text(),
+        type_=postgresql.JSONB(astext_type=sa.Text()),
+        existing_nullable=False,
+        postgresql_using="result::jsonb",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column(
+        "postanalysis",
+        "result",
+        existing_type=postgresql.JSONB(astext_type=sa.Text()),
+        type_=sa.Text(),
+        existing_nullable=False,
+        postgresql_using="result::text",
+    )
@@ -1,17 +1,29 @@
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi_cache.decorator import cache
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.api.dependencies import get_category_by_id, get_post_by_id
+from src.core.cache import (
+    CATEGORY_NAMESPACE,
+    POST_NAMESPACE,
+    POSTS_LIST_NAMESPACE,
+    id_key_builder,
+    invalidate_category_cache,
+    invalidate_post_cache,
+)
 from src.core.database import get_db
 from src.db.crud.posts import (
     create_category,
     create_post,
     delete_category,
     delete_post,
-    get_category_by_name,
+    get_category,
     get_filtered_posts,
+    get_latest_analyses_bulk,
+    get_post,
     update_category,
     update_post,
 )
@@ -27,10 +39,23 @@ from src.schemas.posts import (
     PostResponse,
     PostUpdate,
 )
-from src.services.posts_analyzer import posts_analyzer
+from src.services.posts_analyzer import ANALYSIS_TYPES, posts_analyzer
 
 router = APIRouter()
 
+# Name of the unique index on lowercased category names
+CATEGORY_NAME_UNIQUE = "ix_category_name_lower"
+
+# Name of the foreign key linking posts to their category
+POST_CATEGORY_FK = "fk_post_category_id_category"
+
+
+def _violates_constraint(exc: IntegrityError, constraint_name: str) -> bool:
+    """Check whether an integrity error was raised by the given constraint"""
+    # The asyncpg error behind the DBAPI error names the violated constraint
+    driver_error = exc.orig.__cause__
+    return getattr(driver_error, "constraint_name", None) == constraint_name
+
 
 # Category endpoints
 @router.post(
@@ -43,26 +68,37 @@ async def create_category_endpoint(
     db: AsyncSession = Depends(get_db),
 ):
     """Create a new category"""
-    # Check if category with same name already exists
-    existing_category = await get_category_by_name(db, category_in.name)
-    if existing_category:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Category with name '{category_in.name}' already exists",
-        )
-
-    return await create_category(db, category_in)
+    # Name uniqueness is enforced by the unique index
+    try:
+        return await create_category(db, category_in)
+    except IntegrityError as e:
+        if _violates_constraint(e, CATEGORY_NAME_UNIQUE):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Category with name '{category_in.name}' already exists",
+            ) from e
+        raise
 
 
 @router.get(
     "/categories/{category_id}",
     response_model=CategoryResponse,
 )
+@cache(namespace=CATEGORY_NAMESPACE, key_builder=id_key_builder("category_id"))
 async def get_category_endpoint(
-    category: Category = Depends(get_category_by_id),
+    category_id: int,
+    db: AsyncSession = Depends(get_db),
 ):
     """Get category by ID"""
-    return category
+    # Looked up inside the endpoint, so that cache hits skip the database
+    category = await get_category(db, category_id)
+    if not category:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Category with ID {category_id} not found",
+        )
+
+    return CategoryResponse.model_validate(category)
 
 
 @router.put(
@@ -75,22 +111,24 @@ async def update_category_endpoint(
     db: AsyncSession = Depends(get_db),
 ):
     """Update an existing category"""
-    # Check if new name conflicts with existing category
-    if category_in.name and category_in.name != category.name:
-        existing_category = await get_category_by_name(db, category_in.name)
-        if existing_category:
+    # Name uniqueness is enforced by the unique index
+    try:
+        updated_category = await update_category(db, category.id, category_in)
+    except IntegrityError as e:
+        if _violates_constraint(e, CATEGORY_NAME_UNIQUE):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Category with name '{category_in.name}' already exists",
-            )
+            ) from e
+        raise
 
-    updated_category = await update_category(db, category.id, category_in)
     if not updated_category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Category with ID {category.id} not found",
         )
 
+    await invalidate_category_cache(category.id)
     return updated_category
 
 
@@ -104,6 +142,7 @@ async def delete_category_endpoint(
 ):
     """Delete a category"""
     await delete_category(db, category.id)
+    await invalidate_category_cache(category.id)
     return None
 
 
@@ -118,21 +157,40 @@ async def create_post_endpoint(
     db: AsyncSession = Depends(get_db),
 ):
     """Create a new post"""
-    # Ensure category exists
-    await get_category_by_id(post_in.category_id, db)
+    # Category existence is enforced by the foreign key constraint
+    try:
+        post = await create_post(db, post_in)
+    except IntegrityError as e:
+        if _violates_constraint(e, POST_CATEGORY_FK):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Category with ID {post_in.category_id} not found",
+            ) from e
+        raise
 
-    return await create_post(db, post_in)
+    await invalidate_post_cache(post.id)
+    return post
 
 
 @router.get(
     "/{post_id}",
     response_model=PostResponse,
 )
+@cache(namespace=POST_NAMESPACE, key_builder=id_key_builder("post_id"))
 async def get_post_endpoint(
-    post: Post = Depends(get_post_by_id),
+    post_id: int,
+    db: AsyncSession = Depends(get_db),
 ):
     """Get post by ID"""
-    return post
+    # Looked up inside the endpoint, so that cache hits skip the database
+    post = await get_post(db, post_id)
+    if not post:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Post with ID {post_id} not found",
+        )
+
+    return PostResponse.model_validate(post)
 
 
 @router.put(
@@ -145,17 +203,24 @@ async def update_post_endpoint(
     db: AsyncSession = Depends(get_db),
 ):
     """Update an existing post"""
-    # Check if category exists if category_id is provided
-    if post_in.category_id is not None:
-        await get_category_by_id(post_in.category_id, db)
+    # Category existence is enforced by the foreign key constraint
+    try:
+        updated_post = await update_post(db, post.id, post_in)
+    except IntegrityError as e:
+        if _violates_constraint(e, POST_CATEGORY_FK):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Category with ID {post_in.category_id} not found",
+            ) from e
+        raise
 
-    updated_post = await update_post(db, post.id, post_in)
     if not updated_post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Post with ID {post.id} not found",
         )
 
+    await invalidate_post_cache(post.id)
     return updated_post
 
 
@@ -169,6 +234,7 @@ async def delete_post_endpoint(
 ):
     """Delete a post"""
     await delete_post(db, post.id)
+    await invalidate_post_cache(post.id)
     return None
 
 
@@ -176,10 +242,12 @@ async def delete_post_endpoint(
     "/",
     response_model=PaginatedPostsResponse,
 )
+@cache(namespace=POSTS_LIST_NAMESPACE)
 async def get_posts_endpoint(
     db: AsyncSession = Depends(get_db),
     limit: int = Query(10, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[int] = Query(None, ge=0),
     category_id: Optional[int] = None,
     category_name: Optional[str] = None,
     search_query: Optional[str] = None,
@@ -190,6 +258,7 @@ async def get_posts_endpoint(
 
     - **limit**: Maximum number of posts to return
     - **offset**: Number of posts to skip
+    - **cursor**: ID of the last post of the previous page, used instead of offset
     - **category_id**: Filter by category ID
     - **category_name**: Filter by category name
     - **search_query**: Search in post content
@@ -199,6 +268,7 @@ async def get_posts_endpoint(
     filters = PostFilterParams(
         limit=limit,
         offset=offset,
+        cursor=cursor,
         category_id=category_id,
         category_name=category_name,
         search_query=search_query,
@@ -208,9 +278,15 @@ async def get_posts_endpoint(
     # Get posts with pagination
     posts, total = await get_filtered_posts(db, filters)
 
-    # Calculate next and previous offsets
-    next_offset = offset + limit if offset + limit < total else None
-    prev_offset = offset - limit if offset > 0 else None
+    # Calculate next and previous offsets, they do not apply to cursor pages
+    if cursor is None:
+        next_offset = offset + limit if offset + limit < total else None
+        prev_offset = offset - limit if offset > 0 else None
+    else:
+        next_offset = prev_offset = None
+
+    # A full page may be followed by more posts
+    next_cursor = posts[-1].id if len(posts) == limit else None
 
     return PaginatedPostsResponse(
         total=total,
@@ -218,6 +294,7 @@ async def get_posts_endpoint(
         offset=offset,
         next_offset=next_offset,
         prev_offset=prev_offset,
+        next_cursor=next_cursor,
         items=posts,
     )
 
@@ -267,7 +344,7 @@ async def analyze_filtered_posts_endpoint(
     - **save_results**: Whether to save analysis results to database
     """
     # Validate analysis types
-    valid_types = {"word_frequency", "text_stats", "tags"}
+    valid_types = set(ANALYSIS_TYPES)
     for analysis_type in analysis_types:
         if analysis_type not in valid_types:
             raise HTTPException(
@@ -280,14 +357,11 @@ async def analyze_filtered_posts_endpoint(
         db, filters, analysis_types, save_results
     )
 
-    # Process results
-    post_analyses = []
-    for result in results:
-        post_id = result["post_id"]
-        analysis_result = await posts_analyzer.get_post_analysis_result(
-            db, post_id, run_if_missing=False
-        )
-        if analysis_result:
-            post_analyses.append(analysis_result)
+    # Fetch latest stored analyses of all analyzed posts in one query
+    post_ids = [result["post_id"] for result in results]
+    latest_analyses = await get_latest_analyses_bulk(db, post_ids, ANALYSIS_TYPES)
 
-    return post_analyses
+    return [
+        posts_analyzer.build_analysis_result(latest_analyses.get(post_id, {}))
+        for post_id in post_ids
+    ]
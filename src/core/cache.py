@@ -0,0 +1,229 @@
+import asyncio
+import hashlib
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from fastapi_cache.backends.redis import RedisBackend
+from redis import asyncio as aioredis
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.config import settings
+from src.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Prefix of all cache keys
+CACHE_PREFIX = "posts-api"
+
+# Cache namespaces
+POST_NAMESPACE = "post"
+POSTS_LIST_NAMESPACE = "posts"
+CATEGORY_NAMESPACE = "category"
+
+# Header telling whether a response was served from the cache
+CACHE_STATUS_HEADER = "X-FastAPI-Cache"
+
+
+def _version_key(namespace: str) -> str:
+    """Key holding the current version of a namespace"""
+    return f"{FastAPICache.get_prefix()}:version:{namespace}"
+
+
+async def _namespace_versions(namespace: str) -> List[Optional[bytes]]:
+    """
+    Get versions of a namespace and of the namespaces enclosing it
+
+    A namespace such as "post:1" is covered by the versions of "post"
+    and "post:1", so invalidating "post" drops the entries of every post
+    """
+    parts = namespace.removeprefix(f"{FastAPICache.get_prefix()}:").split(":")
+    scopes = [":".join(parts[: i + 1]) for i in range(len(parts))]
+
+    backend = FastAPICache.get_backend()
+    try:
+        return list(
+            await asyncio.gather(
+                *(backend.get(_version_key(scope)) for scope in scopes)
+            )
+        )
+    except Exception as e:
+        logger.warning("Failed to get cache namespace versions of %s: %s", namespace, e)
+        # A key nobody reads bypasses the cache instead of risking a stale entry
+        return [uuid4().bytes]
+
+
+async def no_db_key_builder(
+    func: Callable[..., Any],
+    namespace: str = "",
+    *,
+    request: Optional[Request] = None,
+    response: Optional[Response] = None,
+    args: Tuple[Any, ...] = (),
+    kwargs: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Build cache key from endpoint arguments, ignoring the database session
+
+    The session is a new object on every request, keeping it in the key
+    would make every request a cache miss. Namespace versions are part of
+    the key, so entries written before an invalidation are not read again
+    """
+    key_kwargs = {name: value for name, value in (kwargs or {}).items() if name != "db"}
+    versions = await _namespace_versions(namespace)
+    digest = hashlib.md5(
+        f"{func.__module__}:{func.__name__}:{args}:{sorted(key_kwargs.items())}:"
+        f"{versions}".encode(),
+        usedforsecurity=False,
+    ).hexdigest()
+    return f"{namespace}:{digest}"
+
+
+def id_key_builder(id_param: str) -> Callable[..., Awaitable[str]]:
+    """
+    Create key builder scoping cached responses by an entity ID,
+    so that responses of a single entity can be invalidated
+
+    Args:
+        id_param: Name of the endpoint parameter holding the ID
+
+    Returns:
+        Key builder function
+    """
+
+    async def key_builder(
+        func: Callable[..., Any], namespace: str = "", **options: Any
+    ) -> str:
+        entity_id = options["kwargs"][id_param]
+        return await no_db_key_builder(func, f"{namespace}:{entity_id}", **options)
+
+    return key_builder
+
+
+def init_cache() -> None:
+    """Initialize response cache"""
+    if settings.CACHE_ENABLED:
+        backend = RedisBackend(aioredis.from_url(settings.REDIS_URL))
+    else:
+        # Responses are not cached, the backend only serves invalidation calls
+        backend = InMemoryBackend()
+
+    FastAPICache.init(
+        backend,
+        prefix=CACHE_PREFIX,
+        expire=settings.CACHE_EXPIRE,
+        key_builder=no_db_key_builder,
+        enable=settings.CACHE_ENABLED,
+        cache_status_header=CACHE_STATUS_HEADER,
+    )
+
+
+async def invalidate_cache(*namespaces: str) -> None:
+    """Drop cached responses of the given namespaces"""
+    if not FastAPICache.get_enable():
+        return
+
+    # Entries are dropped by moving their namespaces to a new version, one
+    # write per namespace instead of scanning the keyspace for their keys.
+    # Versions expire with the entries written before them, after that the
+    # entries are gone as well
+    backend = FastAPICache.get_backend()
+    version = uuid4().bytes
+    results = await asyncio.gather(
+        *(
+            backend.set(_version_key(namespace), version, FastAPICache.get_expire())
+            for namespace in namespaces
+        ),
+        return_exceptions=True,
+    )
+
+    for namespace, result in zip(namespaces, results):
+        if isinstance(result, Exception):
+            # Stale entries expire on their own, so a failed invalidation
+            # must not fail the request
+            logger.warning(
+                "Failed to invalidate cache namespace %s: %s", namespace, result
+            )
+
+
+async def invalidate_post_cache(post_id: int) -> None:
+    """Drop cached responses affected by a change of a post"""
+    await invalidate_cache(f"{POST_NAMESPACE}:{post_id}", POSTS_LIST_NAMESPACE)
+
+
+async def invalidate_category_cache(category_id: int) -> None:
+    """Drop cached responses affected by a change of a category"""
+    # Posts embed their category, so cached posts are dropped as well
+    await invalidate_cache(
+        f"{CATEGORY_NAMESPACE}:{category_id}", POST_NAMESPACE, POSTS_LIST_NAMESPACE
+    )
+
+
+class CacheControlMiddleware:
+    """
+    Make clients revalidate cached responses
+
+    Entries are invalidated on the server only, a max-age would let clients
+    and proxies serve stale entities until it runs out. With no-cache they
+    revalidate on every request instead. fastapi-cache builds its ETag with
+    hash(), which differs between worker processes, so the ETag is replaced
+    by a digest of the body and matching revalidations are answered with 304
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        body = bytearray()
+
+        async def send_with_cache_control(message: Message) -> None:
+            nonlocal start
+
+            if message["type"] == "http.response.start":
+                # Only responses of cached endpoints carry the cache status,
+                # other responses are passed through as they are
+                if CACHE_STATUS_HEADER in MutableHeaders(scope=message):
+                    start = message
+                    return
+            elif message["type"] == "http.response.body" and start is not None:
+                # Cached responses are small JSON documents, buffered to
+                # compute their ETag
+                body.extend(message.get("body", b""))
+                if not message.get("more_body", False):
+                    await self._send_revalidated(scope, start, bytes(body), send)
+                return
+
+            await send(message)
+
+        await self.app(scope, receive, send_with_cache_control)
+
+    @staticmethod
+    async def _send_revalidated(
+        scope: Scope, start: Message, body: bytes, send: Send
+    ) -> None:
+        """Send a buffered cached response, or 304 if the client has it"""
+        headers = MutableHeaders(scope=start)
+        etag = f'W/"{hashlib.md5(body, usedforsecurity=False).hexdigest()}"'
+        headers["ETag"] = etag
+        headers["Cache-Control"] = "no-cache"
+
+        if_none_match = Headers(scope=scope).get("if-none-match", "")
+        if start["status"] == 200 and etag in {
+            tag.strip() for tag in if_none_match.split(",")
+        }:
+            start["status"] = 304
+            del headers["Content-Length"]
+            del headers["Content-Type"]
+            body = b""
+
+        await send(start)
+        await send({"type": "http.response.body", "body": body})
@@ -1,4 +1,5 @@
 import os
+from functools import cached_property, lru_cache
 from typing import Optional
 
 from pydantic import PostgresDsn, computed_field
@@ -23,8 +24,9 @@ class Settings(BaseSettings):
     DATABASE_URL: Optional[PostgresDsn] = None
 
     @computed_field
+    @cached_property
     def database_url(self) -> PostgresDsn:
-        """Generate database URL if not provided directly"""
+        """Generate database URL if not provided directly (computed once)"""
         if self.DATABASE_URL is not None:
             return self.DATABASE_URL
 
@@ -37,10 +39,15 @@ class Settings(BaseSettings):
             path=self.DB_NAME,
         )
 
+    # Environment name, "prod" in production images
+    ENV: str = "dev"
+
     # API settings
     API_HOST: str = "0.0.0.0"
     API_PORT: int = 8000
     DEBUG: bool = False
+    # Number of worker processes, each runs its own event loop and DB pool
+    UVICORN_WORKERS: int = 4
 
     # Logging settings
     LOG_LEVEL: str = "INFO"
@@ -49,5 +56,16 @@ class Settings(BaseSettings):
     BATCH_SIZE: int = 100
     MAX_WORKERS: int = 4
 
+    # Cache settings
+    REDIS_URL: str = "redis://localhost:6379/0"
+    CACHE_ENABLED: bool = True
+    CACHE_EXPIRE: int = 60
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Get application settings, created once per process"""
+    return Settings()
+
 
-settings = Settings()
+settings = get_settings()
@@ -1,5 +1,6 @@
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator
 
+import orjson
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     async_sessionmaker,
@@ -9,13 +10,30 @@ from sqlalchemy.ext.asyncio import (
 from src.core.config import settings
 from src.db.models.base import Base
 
+
+def _json_serializer(value: Any) -> str:
+    """Serialize JSON columns with orjson, keys are coerced like the json module"""
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
 engine = create_async_engine(
     str(settings.database_url),
     echo=settings.DEBUG,
-    pool_size=20,
+    # Every worker process has its own pool
+    pool_size=10,
     max_overflow=10,
     pool_pre_ping=True,
     pool_recycle=3600,
+    # JSONB analysis results are encoded and decoded in C
+    json_serializer=_json_serializer,
+    json_deserializer=orjson.loads,
+    connect_args={
+        # Reuse parsed statements of repeated queries on each connection
+        "prepared_statement_cache_size": 500,
+        "statement_cache_size": 500,
+        # Short OLTP queries do not benefit from JIT compilation
+        "server_settings": {"jit": "off"},
+    },
 )
 
 async_session_maker = async_sessionmaker(
@@ -31,12 +49,13 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with async_session_maker() as session:
         try:
             yield session
-            await session.commit()
+            # CRUD functions commit their own writes, so only commit pending
+            # ORM changes, read-only requests skip the COMMIT round-trip
+            if session.new or session.dirty or session.deleted:
+                await session.commit()
         except Exception:
             await session.rollback()
             raise
-        finally:
-            await session.close()
 
 
 async def init_models():
@@ -6,6 +6,10 @@ from src.core.config import settings
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 LOG_LEVEL = getattr(logging, settings.LOG_LEVEL.upper())
 
+# Shared handler attached to every logger
+_HANDLER = logging.StreamHandler(sys.stdout)
+_HANDLER.setFormatter(logging.Formatter(LOG_FORMAT))
+
 
 def get_logger(name: str) -> logging.Logger:
     """
@@ -21,9 +25,7 @@ def get_logger(name: str) -> logging.Logger:
     logger.setLevel(LOG_LEVEL)
 
     # Avoid adding handlers if they already exist
-    if not logger.handlers:
-        handler = logging.StreamHandler(sys.stdout)
-        handler.setFormatter(logging.Formatter(LOG_FORMAT))
-        logger.addHandler(handler)
+    if _HANDLER not in logger.handlers:
+        logger.addHandler(_HANDLER)
 
     return logger
@@ -1,8 +1,11 @@
-from typing import List, Optional, Tuple, Any
+from itertools import groupby
+from operator import attrgetter
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Any
 
-from sqlalchemy import select, func, or_, and_
+from sqlalchemy import Row, inspect, select, insert, update, func, or_, and_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import raiseload, selectinload
 
 from src.db.models.posts import Post, Category, PostAnalysis
 from src.schemas.posts import (
@@ -18,22 +21,40 @@ from src.schemas.posts import (
 # Category CRUD operations
 async def create_category(db: AsyncSession, category_in: CategoryCreate) -> Category:
     """Create a new category"""
+    # Server side timestamps are fetched back on flush (eager defaults),
+    # so the instance does not need a refresh
     category = Category(**category_in.model_dump())
     db.add(category)
-    await db.commit()
-    await db.refresh(category)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise
     return category
 
 
 async def get_category(db: AsyncSession, category_id: int) -> Optional[Category]:
     """Get category by ID"""
-    result = await db.execute(select(Category).where(Category.id == category_id))
+    return await db.get(Category, category_id)
+
+
+async def get_category_with_posts(
+    db: AsyncSession, category_id: int
+) -> Optional[Category]:
+    """Get category by ID with its posts loaded"""
+    result = await db.execute(
+        select(Category)
+        .where(Category.id == category_id)
+        .options(selectinload(Category.posts), raiseload("*"))
+    )
     return result.scalars().first()
 
 
 async def get_category_by_name(db: AsyncSession, name: str) -> Optional[Category]:
-    """Get category by name"""
-    result = await db.execute(select(Category).where(Category.name == name))
+    """Get category by name, ignoring case"""
+    result = await db.execute(
+        select(Category).where(func.lower(Category.name) == name.lower())
+    )
     return result.scalars().first()
 
 
@@ -49,8 +70,11 @@ async def update_category(
     for field, value in update_data.items():
         setattr(category, field, value)
 
-    await db.commit()
-    await db.refresh(category)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise
     return category
 
 
@@ -68,24 +92,21 @@ async def delete_category(db: AsyncSession, category_id: int) -> bool:
 # Post CRUD operations
 async def create_post(db: AsyncSession, post_in: PostCreate) -> Post:
     """Create a new post"""
-    post = Post(**post_in.model_dump())
-    db.add(post)
-    await db.flush()
-
-    # Update search vector
-    stmt = (
-        Post.__table__.update()
-        .where(Post.id == post.id)
-        .values(
-            search_vector=func.to_tsvector(
-                "russian", func.coalesce(post.title, "") + " " + post.content
-            )
+    # Insert the post and read it back (including the generated search vector)
+    # in one statement
+    stmt = insert(Post).values(**post_in.model_dump()).returning(Post)
+    try:
+        result = await db.execute(
+            select(Post)
+            .from_statement(stmt)
+            .options(selectinload(Post.category), raiseload("*"))
         )
-    )
-    await db.execute(stmt)
+    except IntegrityError:
+        await db.rollback()
+        raise
+    post = result.scalars().one()
 
     await db.commit()
-    await db.refresh(post, ["category"])
     return post
 
 
@@ -93,44 +114,46 @@ async def get_post(
     db: AsyncSession, post_id: int, load_category: bool = True
 ) -> Optional[Post]:
     """Get post by ID"""
-    query = select(Post).where(Post.id == post_id)
-
+    # Relationships that are not loaded eagerly raise instead of lazy loading,
+    # a post already in the identity map is returned without a query
     if load_category:
-        query = query.options(selectinload(Post.category))
+        options = [selectinload(Post.category), raiseload("*")]
+    else:
+        options = [raiseload("*")]
 
-    result = await db.execute(query)
-    return result.scalars().first()
+    post = await db.get(Post, post_id, options=options)
+
+    # Loader options are not applied to a post taken from the identity map
+    if post is not None and load_category and "category" in inspect(post).unloaded:
+        await db.refresh(post, ["category"])
+
+    return post
 
 
 async def update_post(
     db: AsyncSession, post_id: int, post_in: PostUpdate
 ) -> Optional[Post]:
     """Update an existing post"""
-    post = await get_post(db, post_id, load_category=False)
-    if not post:
-        return None
-
     update_data = post_in.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(post, field, value)
-
-    await db.flush()
-
-    # Update search vector if content or title changed
-    if "content" in update_data or "title" in update_data:
-        stmt = (
-            Post.__table__.update()
-            .where(Post.id == post.id)
-            .values(
-                search_vector=func.to_tsvector(
-                    "russian", func.coalesce(post.title, "") + " " + post.content
-                )
-            )
+    if not update_data:
+        return await get_post(db, post_id)
+
+    stmt = update(Post).where(Post.id == post_id).values(**update_data).returning(Post)
+    try:
+        result = await db.execute(
+            select(Post)
+            .from_statement(stmt)
+            .options(selectinload(Post.category), raiseload("*"))
+            .execution_options(populate_existing=True)
         )
-        await db.execute(stmt)
+    except IntegrityError:
+        await db.rollback()
+        raise
+    post = result.scalars().first()
+    if not post:
+        return None
 
     await db.commit()
-    await db.refresh(post)
     return post
 
 
@@ -159,7 +182,7 @@ async def get_posts_count(db: AsyncSession, filters: PostFilterParams) -> int:
 
 
 async def get_filtered_posts(
-    db: AsyncSession, filters: PostFilterParams
+    db: AsyncSession, filters: PostFilterParams, load_category: bool = True
 ) -> Tuple[List[Post], int]:
     """
     Get filtered and paginated posts
@@ -167,25 +190,87 @@ async def get_filtered_posts(
     Returns:
         Tuple containing list of posts and total count
     """
-    # Get total count first
-    total = await get_posts_count(db, filters)
+    # Build main query with joins and filters, categories of the whole page
+    # are loaded by one extra query
+    if load_category:
+        options = [selectinload(Post.category), raiseload("*")]
+    else:
+        options = [raiseload("*")]
 
-    # Build main query with joins and filters
-    query = select(Post).options(selectinload(Post.category))
+    query = select(Post).options(*options)
 
-    # Apply filters
+    # Apply filters and pagination
     query = _apply_post_filters(query, filters)
+    query = _paginate_posts(query, filters)
+
+    if filters.cursor is not None:
+        result = await db.execute(query)
+        posts = list(result.scalars().all())
 
-    # Apply pagination
-    query = query.offset(filters.offset).limit(filters.limit)
+        # The page only holds posts after the cursor, count all of them
+        total = await get_posts_count(db, filters)
+        return posts, total
+
+    # The window function returns the total count of filtered posts
+    # alongside every row of the page
+    query = query.add_columns(func.count().over().label("total"))
 
     # Execute query
     result = await db.execute(query)
-    posts = result.scalars().all()
+    rows = result.all()
+    posts = [row[0] for row in rows]
+
+    if rows:
+        total = rows[0].total
+    elif filters.offset > 0:
+        # Offset is past the last post, so there is no row to carry the total
+        total = await get_posts_count(db, filters)
+    else:
+        total = 0
 
     return posts, total
 
 
+async def stream_filtered_posts(
+    db: AsyncSession, filters: PostFilterParams, batch_size: int
+) -> AsyncIterator[List[Row]]:
+    """
+    Stream IDs and contents of filtered and paginated posts in batches
+    through a server side cursor
+
+    Args:
+        db: Database session
+        filters: Filter parameters
+        batch_size: Number of posts fetched and yielded at a time
+
+    Yields:
+        Lists of at most batch_size rows with id and content of posts
+    """
+    # Analysis only needs the content, plain rows skip loading ORM objects
+    # and only the fetched batch is held in memory
+    query = select(Post.id, Post.content)
+    query = _apply_post_filters(query, filters)
+    query = _paginate_posts(query, filters)
+
+    result = await db.stream(query.execution_options(yield_per=batch_size))
+    async for batch in result.partitions():
+        yield list(batch)
+
+
+def _paginate_posts(query: Any, filters: PostFilterParams) -> Any:
+    """Apply pagination to a post query, ordered by ID so that pages are stable"""
+    query = query.order_by(Post.id)
+
+    if filters.cursor is not None:
+        # Keyset pagination seeks past the previous page through the primary
+        # key index instead of scanning and discarding skipped rows
+        query = query.where(Post.id > filters.cursor)
+    else:
+        query = query.offset(filters.offset)
+
+    return query.limit(filters.limit)
+
+
 def _apply_post_filters(query: Any, filters: PostFilterParams) -> Any:
     """Apply filters to a post query"""
     filter_conditions = []
@@ -194,10 +279,12 @@ def _apply_post_filters(query: Any, filters: PostFilterParams) -> Any:
     if filters.category_id is not None:
         filter_conditions.append(Post.category_id == filters.category_id)
 
-    # Filter by category name
+    # Filter by category name, ignoring case like the unique name index
     if filters.category_name is not None:
         query = query.join(Category)
-        filter_conditions.append(Category.name == filters.category_name)
+        filter_conditions.append(
+            func.lower(Category.name) == filters.category_name.lower()
+        )
 
     # Filter by search query
     if filters.search_query:
@@ -206,11 +293,13 @@ def _apply_post_filters(query: Any, filters: PostFilterParams) -> Any:
             search_query = func.plainto_tsquery("russian", filters.search_query)
             filter_conditions.append(Post.search_vector.op("@@")(search_query))
         else:
-            # Use ILIKE for simple text search
-            search_pattern = f"%{filters.search_query}%"
+            # Use case-insensitive LIKE for simple text search, lower() on both
+            # sides matches the trigram expression indexes
+            search_pattern = func.lower(f"%{filters.search_query}%")
             filter_conditions.append(
                 or_(
-                    Post.content.ilike(search_pattern), Post.title.ilike(search_pattern)
+                    func.lower(Post.content).like(search_pattern),
+                    func.lower(Post.title).like(search_pattern),
                 )
             )
 
@@ -226,13 +315,27 @@ async def create_post_analysis(
     db: AsyncSession, analysis_in: PostAnalysisCreate
 ) -> PostAnalysis:
     """Create a new post analysis record"""
+    # Server side timestamps are fetched back on flush (eager defaults),
+    # so the instance does not need a refresh
     analysis = PostAnalysis(**analysis_in.model_dump())
     db.add(analysis)
     await db.commit()
-    await db.refresh(analysis)
     return analysis
 
 
+async def create_post_analyses_bulk(
+    db: AsyncSession, analyses_in: List[PostAnalysisCreate]
+) -> None:
+    """Create several post analysis records in one statement"""
+    if not analyses_in:
+        return
+
+    await db.execute(
+        insert(PostAnalysis), [analysis_in.model_dump() for analysis_in in analyses_in]
+    )
+    await db.commit()
+
+
 async def get_post_analyses(
     db: AsyncSession, post_id: int, analysis_type: Optional[str] = None
 ) -> List[PostAnalysis]:
@@ -261,3 +364,63 @@ async def get_latest_post_analysis(
 
     result = await db.execute(query)
     return result.scalars().first()
+
+
+async def get_latest_post_analyses(
+    db: AsyncSession, post_id: int, analysis_types: List[str]
+) -> Dict[str, PostAnalysis]:
+    """
+    Get the latest analysis of each of the given types for a post in one query
+
+    Returns:
+        Dict mapping analysis type to its latest analysis
+    """
+    query = (
+        select(PostAnalysis)
+        .where(
+            PostAnalysis.post_id == post_id,
+            PostAnalysis.analysis_type.in_(analysis_types),
+        )
+        .distinct(PostAnalysis.analysis_type)
+        .order_by(PostAnalysis.analysis_type, PostAnalysis.created_at.desc())
+    )
+
+    result = await db.execute(query)
+    return {analysis.analysis_type: analysis for analysis in result.scalars()}
+
+
+async def get_latest_analyses_bulk(
+    db: AsyncSession, post_ids: List[int], analysis_types: List[str]
+) -> Dict[int, Dict[str, PostAnalysis]]:
+    """
+    Get the latest analysis of each type for several posts in one query
+
+    Returns:
+        Dict mapping post ID to its latest analyses keyed by analysis type
+    """
+    if not post_ids:
+        return {}
+
+    # Only the latest row of each post and type is returned, read in order
+    # of the (post_id, analysis_type, created_at DESC) index
+    query = (
+        select(PostAnalysis)
+        .where(
+            PostAnalysis.post_id.in_(post_ids),
+            PostAnalysis.analysis_type.in_(analysis_types),
+        )
+        .distinct(PostAnalysis.post_id, PostAnalysis.analysis_type)
+        .order_by(
+            PostAnalysis.post_id,
+            PostAnalysis.analysis_type,
+            PostAnalysis.created_at.desc(),
+        )
+    )
+
+    result = await db.execute(query)
+
+    # Rows are grouped by post
+    return {
+        post_id: {analysis.analysis_type: analysis for analysis in analyses}
+        for post_id, analyses in groupby(result.scalars(), key=attrgetter("post_id"))
+    }
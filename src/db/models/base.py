@@ -1,7 +1,7 @@
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
 
-from sqlalchemy import MetaData
+from sqlalchemy import MetaData, func
 from sqlalchemy.ext.declarative import declared_attr
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
@@ -27,16 +27,33 @@ class Base(DeclarativeBase):
     def __tablename__(cls) -> str:
         return cls.__name__.lower()
 
+    # Column names of the mapped table, collected once per model class
+    __column_names__: Tuple[str, ...] = ()
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        if hasattr(cls, "__table__"):
+            cls.__column_names__ = tuple(c.name for c in cls.__table__.columns)
+
     # JSON serialization method
     def to_dict(self) -> Dict[str, Any]:
         """Convert model instance to dictionary"""
-        return {c.name: getattr(self, c.name) for c in self.__table__.columns}
+        return {name: getattr(self, name) for name in self.__column_names__}
+
+
+def utc_now() -> Any:
+    """Current UTC time computed by the database"""
+    return func.timezone("UTC", func.now())
 
 
 class TimestampMixin:
     """Mixin to add created_at and updated_at fields to models"""
 
-    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    # Timestamps are set by the database, eager defaults fetch them back
+    # with RETURNING on flush
+    __mapper_args__ = {"eager_defaults": True}
+
+    created_at: Mapped[datetime] = mapped_column(server_default=utc_now())
     updated_at: Mapped[datetime] = mapped_column(
-        default=datetime.utcnow, onupdate=datetime.utcnow
+        server_default=utc_now(), onupdate=utc_now()
     )
@@ -1,7 +1,17 @@
-from typing import List, Optional
-from sqlalchemy import String, Text, ForeignKey, Index, func
+from typing import Any, Dict, List, Optional
+from sqlalchemy import (
+    DDL,
+    String,
+    Text,
+    ForeignKey,
+    Index,
+    Computed,
+    LargeBinary,
+    event,
+    func,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 
 from src.db.models.base import Base, TimestampMixin
 
@@ -10,12 +20,20 @@ class Category(Base, TimestampMixin):
     """Category model for post categorization"""
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    name: Mapped[str] = mapped_column(String(100), unique=True, index=True)
+    # Unique regardless of case, see ix_category_name_lower
+    name: Mapped[str] = mapped_column(String(100))
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
 
     # Relationship with Post model
+    # Posts are removed by the ON DELETE CASCADE foreign key, so they
+    # are not loaded on delete
+    # Relationships raise instead of emitting lazy load queries, queries load
+    # them eagerly
     posts: Mapped[List["Post"]] = relationship(
-        back_populates="category", cascade="all, delete-orphan"
+        back_populates="category",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="raise_on_sql",
     )
 
     def __repr__(self) -> str:
@@ -31,25 +49,65 @@ class Post(Base, TimestampMixin):
     )
     content: Mapped[str] = mapped_column(Text)
     title: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    # Generated by PostgreSQL from title and content on every insert/update
     search_vector: Mapped[Optional[TSVECTOR]] = mapped_column(
-        TSVECTOR, nullable=True, index=True
+        TSVECTOR,
+        Computed(
+            "to_tsvector('russian', coalesce(title, '') || ' ' || content)",
+            persisted=True,
+        ),
+        nullable=True,
     )
 
     # Relationship with Category model
-    category: Mapped[Category] = relationship(back_populates="posts")
+    category: Mapped[Category] = relationship(
+        back_populates="posts", lazy="raise_on_sql"
+    )
 
     # Relationship with PostAnalysis model
     analyses: Mapped[List["PostAnalysis"]] = relationship(
-        back_populates="post", cascade="all, delete-orphan"
+        back_populates="post",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="raise_on_sql",
     )
 
     def __repr__(self) -> str:
         return f"<Post {self.id}: {self.title or 'Untitled'}>"
 
 
+# Category names are unique and looked up regardless of case
+Index("ix_category_name_lower", func.lower(Category.name), unique=True)
+
+# Posts of a category in ID order, serving the category filter with its
+# pagination order and the foreign key
+Index("ix_post_category_id_id", Post.category_id, Post.id)
+
 # Creating a GIN index for full-text search
 Index("ix_post_search_vector_gin", Post.search_vector, postgresql_using="gin")
 
+# Creating trigram GIN indexes on lowercased text for case-insensitive
+# substring search
+Index(
+    "ix_post_content_trgm",
+    func.lower(Post.content).label("lower_content"),
+    postgresql_using="gin",
+    postgresql_ops={"lower_content": "gin_trgm_ops"},
+)
+Index(
+    "ix_post_title_trgm",
+    func.lower(Post.title).label("lower_title"),
+    postgresql_using="gin",
+    postgresql_ops={"lower_title": "gin_trgm_ops"},
+)
+
+# Trigram operator classes are provided by the pg_trgm extension
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
 
 class PostAnalysis(Base, TimestampMixin):
     """Model for storing post analysis results"""
@@ -57,26 +115,22 @@ class PostAnalysis(Base, TimestampMixin):
     id: Mapped[int] = mapped_column(primary_key=True)
     post_id: Mapped[int] = mapped_column(ForeignKey("post.id", ondelete="CASCADE"))
     analysis_type: Mapped[str] = mapped_column(String(50))
-    result: Mapped[str] = mapped_column(Text)
+    result: Mapped[Dict[str, Any]] = mapped_column(JSONB)
+    # Digest of the analyzed content, results of unchanged content are reused
+    content_hash: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
 
     # Relationship with Post model
-    post: Mapped[Post] = relationship(back_populates="analyses")
+    post: Mapped[Post] = relationship(back_populates="analyses", lazy="raise_on_sql")
 
     def __repr__(self) -> str:
         return f"<PostAnalysis {self.id}: {self.analysis_type}>"
 
 
-# Function to create or update search vector
-def update_post_search_vector(session, post_id):
-    """Update the search vector for a post"""
-    stmt = (
-        Post.__table__.update()
-        .where(Post.id == post_id)
-        .values(
-            search_vector=func.to_tsvector(
-                "russian",
-                func.coalesce(Post.title, "") + " " + func.coalesce(Post.content, ""),
-            )
-        )
-    )
-    session.execute(stmt)
+# Composite index serving lookups of the latest analyses of a post,
+# it also covers the foreign key
+Index(
+    "ix_postanalysis_latest",
+    PostAnalysis.post_id,
+    PostAnalysis.analysis_type,
+    PostAnalysis.created_at.desc(),
+)
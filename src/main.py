@@ -1,13 +1,27 @@
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from src.api.router import api_router
+from src.core.cache import CacheControlMiddleware, init_cache
 from src.core.config import settings
 from src.core.logger import get_logger
+from src.services.posts_analyzer import posts_analyzer
 
 logger = get_logger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup and shutdown"""
+    init_cache()
+    yield
+    posts_analyzer.shutdown()
+
+
 # Create FastAPI application
 app = FastAPI(
     title="Posts Analyzer API",
@@ -16,6 +30,8 @@ app = FastAPI(
     docs_url="/api/docs",
     redoc_url="/api/redoc",
     openapi_url="/api/openapi.json",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Add CORS middleware
@@ -26,6 +42,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CacheControlMiddleware)
 
 # Include API router
 app.include_router(api_router, prefix="/api/v1")
@@ -44,6 +61,8 @@ def start():
         host=settings.API_HOST,
         port=settings.API_PORT,
         reload=settings.DEBUG,
+        # Reload mode supports a single worker only
+        workers=1 if settings.DEBUG else settings.UVICORN_WORKERS,
         log_level=settings.LOG_LEVEL.lower(),
     )
 
@@ -74,14 +74,14 @@ class PostAnalysisBase(BaseModel):
     """Base schema for PostAnalysis data"""
 
     analysis_type: str
-    result: str
+    result: Dict[str, Any]
     post_id: int
 
 
 class PostAnalysisCreate(PostAnalysisBase):
     """Schema for creating a new PostAnalysis"""
 
-    pass
+    content_hash: Optional[bytes] = None
 
 
 class PostAnalysisResponse(PostAnalysisBase):
@@ -101,6 +101,8 @@ class PaginationParams(BaseModel):
 
     limit: int = Field(10, ge=1, le=100)
     offset: int = Field(0, ge=0)
+    # ID of the last item of the previous page, replaces offset when set
+    cursor: Optional[int] = Field(None, ge=0)
 
 
 class PostFilterParams(PaginationParams):
@@ -120,6 +122,7 @@ class PaginatedResponse(BaseModel):
     offset: int
     next_offset: Optional[int] = None
     prev_offset: Optional[int] = None
+    next_cursor: Optional[int] = None
 
 
 class PaginatedPostsResponse(PaginatedResponse):
@@ -1,24 +1,32 @@
 import asyncio
-import json
+import hashlib
+import math
+import multiprocessing
 import re
+import sys
 from collections import Counter
-from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import filterfalse
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
 
 import nltk
 from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize, sent_tokenize
+from sqlalchemy import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.config import settings
 from src.core.database import async_session_maker
 from src.core.logger import get_logger
 from src.db.crud.posts import (
-    get_filtered_posts,
-    create_post_analysis,
+    get_posts_count,
+    stream_filtered_posts,
+    create_post_analyses_bulk,
     get_post,
-    get_latest_post_analysis,
+    get_latest_post_analyses,
+    get_latest_analyses_bulk,
 )
-from src.db.models.posts import Post
+from src.db.models.posts import Post, PostAnalysis
 from src.schemas.posts import (
     PostFilterParams,
     PostAnalysisCreate,
@@ -30,15 +38,214 @@ from src.schemas.posts import (
 
 logger = get_logger(__name__)
 
-# Download NLTK resources
-try:
-    nltk.data.find("tokenizers/punkt")
-    nltk.data.find("corpora/stopwords")
-    nltk.data.find("tokenizers/punkt_tab")
-except LookupError:
-    nltk.download("punkt")
-    nltk.download("stopwords")
-    nltk.download("punkt_tab")
+# Supported analysis types
+ANALYSIS_TYPES = ["word_frequency", "text_stats", "tags"]
+
+# Words are runs of letters, without digits and underscores
+_WORD_RE = re.compile(r"[^\W\d_]+")
+
+# Sentences are runs of text up to terminal punctuation or the end of text
+_SENT_RE = re.compile(r"[^.!?\s][^.!?]*(?:[.!?]+|$)")
+
+# Hashtags are scanned in the original text, separately from word tokens
+_HASHTAG_RE = re.compile(r"#(\w+)")
+
+# Number of tokenized texts kept in memory by each process. The cache only
+# has to bridge the analyses of the post being analyzed, so a few entries are
+# enough, and texts with their tokens are not kept for thousands of posts
+TOKENIZE_CACHE_SIZE = 32
+
+# Number of fetched batches waiting for each analysis worker
+QUEUED_BATCHES_PER_WORKER = 2
+
+# NLTK resources used by the analyzer, mapped to their data paths
+NLTK_RESOURCES = {"stopwords": "corpora/stopwords"}
+
+
+@lru_cache(maxsize=None)
+def _ensure_nltk_data() -> None:
+    """
+    Download missing NLTK resources, checked once per process
+
+    Production images ship the data, so nothing is looked up there
+    """
+    if settings.ENV == "prod":
+        return
+
+    for resource, path in NLTK_RESOURCES.items():
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            nltk.download(resource)
+
+
+@lru_cache(maxsize=None)
+def _load_stopwords(language: str) -> FrozenSet[str]:
+    """Load stopwords of a language from the NLTK corpus, read once per process"""
+    _ensure_nltk_data()
+    return frozenset(map(sys.intern, stopwords.words(language)))
+
+
+@lru_cache(maxsize=None)
+def _all_stopwords() -> FrozenSet[str]:
+    """
+    Stopwords of all supported languages
+
+    Read from the NLTK corpus on first use rather than on import,
+    interned frozensets keep lookups cheap
+    """
+    return _load_stopwords("russian") | _load_stopwords("english")
+
+
+# All analysis types of a post share one tokenization of its content
+@lru_cache(maxsize=TOKENIZE_CACHE_SIZE)
+def _tokenize(text: str) -> Tuple[Tuple[str, ...], Tuple[str, ...], int, Counter]:
+    """
+    Tokenize text for analysis
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        Tuple containing lowercased words without stopwords, all lowercased
+        words, number of sentences and counts of the filtered words (shared,
+        do not modify)
+    """
+    # The text is lowercased once and stopwords are dropped by a C level
+    # filter, no Python code runs per word
+    words = tuple(_WORD_RE.findall(text.lower()))
+    filtered_words = tuple(filterfalse(_all_stopwords().__contains__, words))
+    # Only the number of sentences is used, the cache does not keep a second
+    # copy of the text split into sentences
+    sentence_count = len(_SENT_RE.findall(text))
+    return filtered_words, words, sentence_count, Counter(filtered_words)
+
+
+def _analyze_word_frequency(text: str) -> Dict[str, Any]:
+    """
+    Analyze word frequency in text
+
+    Args:
+        text: Text to analyze
+
+    Returns:
+        Dict containing word frequency analysis
+    """
+    # Tokenize text, remove stopwords and count word frequencies
+    filtered_words, _, _, word_counts = _tokenize(text)
+    total_words = len(filtered_words)
+
+    # Calculate frequencies
+    word_frequencies = [
+        {
+            "word": word,
+            "count": count,
+            "frequency": count / total_words if total_words > 0 else 0,
+        }
+        for word, count in word_counts.most_common(20)
+    ]
+
+    return {
+        "total_unique_words": len(word_counts),
+        "total_words_after_filtering": total_words,
+        "word_frequencies": word_frequencies,
+    }
+
+
+def _analyze_text_stats(text: str) -> Dict[str, Any]:
+    """
+    Analyze text statistics
+
+    Args:
+        text: Text to analyze
+
+    Returns:
+        Dict containing text statistics
+    """
+    # Tokenize sentences and words
+    _, words, sentence_count, _ = _tokenize(text)
+
+    # Calculate statistics
+    word_count = len(words)
+    char_count = len(text)
+
+    # Avoid division by zero, averages of empty texts are still floats
+    avg_word_length = sum(map(len, words)) / word_count if word_count > 0 else 0.0
+    avg_sentence_length = word_count / sentence_count if sentence_count > 0 else 0.0
+
+    return {
+        "word_count": word_count,
+        "char_count": char_count,
+        "sentence_count": sentence_count,
+        "avg_word_length": round(avg_word_length, 2),
+        "avg_sentence_length": round(avg_sentence_length, 2),
+    }
+
+
+def _extract_tags(text: str) -> Dict[str, Any]:
+    """
+    Extract potential tags from text
+
+    Args:
+        text: Text to analyze
+
+    Returns:
+        Dict containing extracted tags
+    """
+    # Tokenize text, remove stopwords and count word frequencies
+    _, _, _, word_counts = _tokenize(text)
+
+    # Extract potential tags (most frequent words)
+    tags = [word for word, _ in word_counts.most_common(10)]
+
+    # Also look for hashtags in original text, the only scan of the text
+    # besides the shared tokenization
+    hashtags = _HASHTAG_RE.findall(text)
+
+    return {
+        "extracted_tags": tags,
+        "hashtags": hashtags,
+    }
+
+
+# Analysis functions by analysis type
+_ANALYZERS: Dict[str, Callable[[str], Dict[str, Any]]] = {
+    "word_frequency": _analyze_word_frequency,
+    "text_stats": _analyze_text_stats,
+    "tags": _extract_tags,
+}
+
+
+def _analyze_content(
+    content: str, analysis_types: List[str]
+) -> Dict[str, Dict[str, Any]]:
+    """Run analyses of post content, picklable for worker processes"""
+    analyses = {}
+
+    for analysis_type in analysis_types:
+        analyze = _ANALYZERS.get(analysis_type)
+        if analyze is None:
+            logger.warning("Unknown analysis type: %s", analysis_type)
+            continue
+
+        analyses[analysis_type] = analyze(content)
+
+    return analyses
+
+
+def _analyze_contents(
+    contents: List[Tuple[str, List[str]]],
+) -> List[Dict[str, Dict[str, Any]]]:
+    """Run analyses of a batch of post contents in a worker process"""
+    return [
+        _analyze_content(content, analysis_types)
+        for content, analysis_types in contents
+    ]
+
+
+def _content_hash(content: str) -> bytes:
+    """Digest of post content identifying the analyzed text"""
+    return hashlib.blake2b(content.encode(), digest_size=16).digest()
 
 
 class PostsAnalyzer:
@@ -54,9 +261,15 @@ class PostsAnalyzer:
         """
         self.batch_size = batch_size or settings.BATCH_SIZE
         self.max_workers = max_workers or settings.MAX_WORKERS
-        self.russian_stopwords = set(stopwords.words("russian"))
-        self.english_stopwords = set(stopwords.words("english"))
-        self.all_stopwords = self.russian_stopwords.union(self.english_stopwords)
+
+        # Worker processes for CPU bound analysis
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    # Analysis kernels are module level functions, so that worker processes
+    # run them without pickling the analyzer
+    _analyze_word_frequency = staticmethod(_analyze_word_frequency)
+    _analyze_text_stats = staticmethod(_analyze_text_stats)
+    _extract_tags = staticmethod(_extract_tags)
 
     async def analyze_filtered_posts(
         self,
@@ -78,190 +291,237 @@ class PostsAnalyzer:
             Tuple containing list of post analyzes and metadata
         """
         if not analysis_types:
-            analysis_types = ["word_frequency", "text_stats", "tags"]
+            analysis_types = list(ANALYSIS_TYPES)
+
+        total_count = await get_posts_count(db, filters)
 
-        # Get posts with pagination
-        posts, total_count = await get_filtered_posts(db, filters)
+        # The page is streamed, so its size is bounded by the limit and the
+        # number of posts left after the offset
+        page_size = min(filters.limit, total_count)
+        if filters.cursor is None:
+            page_size = min(page_size, max(0, total_count - filters.offset))
+
+        # Split posts into batches analyzed by one worker process call each,
+        # batches are small enough to keep every worker process busy
+        batch_size = max(
+            1, min(self.batch_size, math.ceil(page_size / self.max_workers))
+        )
+        # At least one worker drains the stream, even if the count was stale
+        workers_count = max(1, min(self.max_workers, math.ceil(page_size / batch_size)))
+
+        # Queue of batches with their positions, so results keep the post order,
+        # None tells a worker that the stream is exhausted. The queue is
+        # bounded, so fetching pauses while workers are busy and only a few
+        # batches are held in memory
+        queue: asyncio.Queue[Optional[Tuple[int, List[Row]]]] = asyncio.Queue(
+            maxsize=QUEUED_BATCHES_PER_WORKER * workers_count
+        )
+        batch_results: Dict[int, List[Dict[str, Any]]] = {}
+
+        async def produce() -> None:
+            start = 0
+            async for batch in stream_filtered_posts(db, filters, batch_size):
+                await queue.put((start, batch))
+                start += len(batch)
+
+            # A failure cancels the workers instead
+            for _ in range(workers_count):
+                await queue.put(None)
+
+        async def worker() -> None:
+            # Создаем новую сессию для каждого обработчика
+            async with async_session_maker() as session:
+                while (item := await queue.get()) is not None:
+                    start, batch = item
+                    batch_results[start] = await self._analyze_batch(
+                        session, batch, analysis_types, save_results
+                    )
+
+        # Posts are fed to a fixed number of workers while they are streamed,
+        # a failing worker cancels the others instead of leaving them running
+        try:
+            async with asyncio.TaskGroup() as task_group:
+                task_group.create_task(produce())
+                for _ in range(workers_count):
+                    task_group.create_task(worker())
+        except ExceptionGroup as e:
+            # Surface the original error to callers, its own traceback is kept
+            raise e.exceptions[0] from None
+
+        results = [
+            result for start in sorted(batch_results) for result in batch_results[start]
+        ]
 
-        # Process posts in batches
         metadata = {
             "total_posts": total_count,
-            "processed_posts": len(posts),
+            "processed_posts": len(results),
             "analysis_types": analysis_types,
         }
 
-        # Use semaphore to limit concurrent processing
-        semaphore = asyncio.Semaphore(self.max_workers)
-
-        async def process_post(post: Post) -> Dict[str, Any]:
-            async with semaphore:
-                # Создаем новую сессию для каждой обработки
-                async with async_session_maker() as session:
-                    return await self._analyze_post(
-                        session, post, analysis_types, save_results
-                    )
-
-        # Process posts concurrently with controlled concurrency
-        tasks = [process_post(post) for post in posts]
-        results = await asyncio.gather(*tasks)
-
         return results, metadata
 
-    async def _analyze_post(
+    async def _analyze_batch(
         self,
         db: AsyncSession,
-        post: Post,
+        posts: List[Row],
         analysis_types: List[str],
         save_results: bool,
-    ) -> Dict[str, Any]:
+    ) -> List[Dict[str, Any]]:
         """
-        Analyze a single post with specified analysis types
+        Analyze a batch of posts with specified analysis types
 
         Args:
             db: Database session
-            post: Post to analyze
+            posts: Rows with id and content of the posts to analyze
             analysis_types: Types of analysis to perform
             save_results: Whether to save analysis results to database
 
         Returns:
-            Dict containing post ID and analysis results
+            List of dicts containing post ID and analysis results
         """
-        result = {
-            "post_id": post.id,
-            "analyses": {},
-        }
+        hashes = [_content_hash(post.content) for post in posts]
 
-        for analysis_type in analysis_types:
-            if analysis_type == "word_frequency":
-                analysis_result = self._analyze_word_frequency(post.content)
-            elif analysis_type == "text_stats":
-                analysis_result = self._analyze_text_stats(post.content)
-            elif analysis_type == "tags":
-                analysis_result = self._extract_tags(post.content)
-            else:
-                logger.warning(f"Unknown analysis type: {analysis_type}")
-                continue
-
-            result["analyses"][analysis_type] = analysis_result
-
-            # Save to database if requested
-            if save_results:
-                analysis_data = PostAnalysisCreate(
-                    post_id=post.id,
-                    analysis_type=analysis_type,
-                    result=json.dumps(analysis_result),
-                )
-                await create_post_analysis(db, analysis_data)
-
-        return result
-
-    def _analyze_word_frequency(self, text: str) -> Dict[str, Any]:
-        """
-        Analyze word frequency in text
-
-        Args:
-            text: Text to analyze
-
-        Returns:
-            Dict containing word frequency analysis
-        """
-        # Clean and tokenize text
-        clean_text = re.sub(r"[^\w\s]", " ", text.lower())
-        words = word_tokenize(clean_text)
+        # Stored results of unchanged content are reused, only analyses of new
+        # or changed content are run
+        stored = await get_latest_analyses_bulk(
+            db, [post.id for post in posts], analysis_types
+        )
+        reused = [
+            {
+                analysis_type: analysis.result
+                for analysis_type, analysis in stored.get(post.id, {}).items()
+                if analysis.content_hash == content_hash
+            }
+            for post, content_hash in zip(posts, hashes)
+        ]
+        pending = [
+            [t for t in analysis_types if t not in post_reused]
+            for post_reused in reused
+        ]
 
-        # Remove stopwords
-        filtered_words = [
-            word for word in words if word.isalpha() and word not in self.all_stopwords
+        # The rest of the batch is sent to a worker process in one call
+        contents = [
+            (post.content, types) for post, types in zip(posts, pending) if types
         ]
+        fresh_analyses = []
+        if contents:
+            loop = asyncio.get_running_loop()
+            fresh_analyses = await loop.run_in_executor(
+                self._get_pool(), _analyze_contents, contents
+            )
+        fresh = iter(fresh_analyses)
 
-        # Count word frequencies
-        word_counts = Counter(filtered_words)
-        total_words = len(filtered_words)
+        results = []
+        records = []
+        for post, content_hash, post_reused, types in zip(
+            posts, hashes, reused, pending
+        ):
+            post_fresh = next(fresh) if types else {}
+            records.extend(self._build_analyses(post.id, post_fresh, content_hash))
+
+            analyses = {**post_reused, **post_fresh}
+            results.append(
+                {
+                    "post_id": post.id,
+                    "analyses": {
+                        t: analyses[t] for t in analysis_types if t in analyses
+                    },
+                }
+            )
 
-        # Calculate frequencies
-        word_frequencies = [
-            {
-                "word": word,
-                "count": count,
-                "frequency": count / total_words if total_words > 0 else 0,
-            }
-            for word, count in word_counts.most_common(20)
-        ]
+        if save_results:
+            # New analyses of the whole batch are saved in one statement
+            await create_post_analyses_bulk(db, records)
 
-        return {
-            "total_unique_words": len(word_counts),
-            "total_words_after_filtering": total_words,
-            "word_frequencies": word_frequencies,
-        }
+        return results
 
-    def _analyze_text_stats(self, text: str) -> Dict[str, Any]:
+    async def _analyze_post(
+        self,
+        db: AsyncSession,
+        post: Post,
+        analysis_types: List[str],
+        save_results: bool,
+    ) -> Dict[str, Any]:
         """
-        Analyze text statistics
+        Analyze a single post with specified analysis types
 
         Args:
-            text: Text to analyze
+            db: Database session
+            post: Post to analyze
+            analysis_types: Types of analysis to perform
+            save_results: Whether to save analysis results to database
 
         Returns:
-            Dict containing text statistics
+            Dict containing post ID and analysis results
         """
-        # Tokenize sentences and words
-        sentences = sent_tokenize(text)
-        words = word_tokenize(text)
+        # Analysis is CPU bound, run it in a worker process so that posts
+        # are analyzed in parallel while the event loop serves database IO
+        loop = asyncio.get_running_loop()
+        analyses = await loop.run_in_executor(
+            self._get_pool(), _analyze_content, post.content, analysis_types
+        )
 
-        # Filter out non-alphabetic tokens
-        words = [word for word in words if word.isalpha()]
+        result = {
+            "post_id": post.id,
+            "analyses": analyses,
+        }
 
-        # Calculate statistics
-        word_count = len(words)
-        char_count = len(text)
-        sentence_count = len(sentences)
+        if save_results:
+            await create_post_analyses_bulk(
+                db,
+                self._build_analyses(post.id, analyses, _content_hash(post.content)),
+            )
 
-        # Avoid division by zero
-        avg_word_length = (
-            sum(len(word) for word in words) / word_count if word_count > 0 else 0
-        )
-        avg_sentence_length = word_count / sentence_count if sentence_count > 0 else 0
-
-        return {
-            "word_count": word_count,
-            "char_count": char_count,
-            "sentence_count": sentence_count,
-            "avg_word_length": round(avg_word_length, 2),
-            "avg_sentence_length": round(avg_sentence_length, 2),
-        }
+        return result
+
+    def _build_analyses(
+        self,
+        post_id: int,
+        analyses: Dict[str, Dict[str, Any]],
+        content_hash: Optional[bytes] = None,
+    ) -> List[PostAnalysisCreate]:
+        """Build analysis records of a post to be saved to database"""
+        return [
+            PostAnalysisCreate(
+                post_id=post_id,
+                analysis_type=analysis_type,
+                result=analysis_result,
+                content_hash=content_hash,
+            )
+            for analysis_type, analysis_result in analyses.items()
+        ]
 
-    def _extract_tags(self, text: str) -> Dict[str, Any]:
+    def analyze_content(
+        self, content: str, analysis_types: List[str]
+    ) -> Dict[str, Dict[str, Any]]:
         """
-        Extract potential tags from text
+        Run analyses of post content
 
         Args:
-            text: Text to analyze
+            content: Post content
+            analysis_types: Types of analysis to perform
 
         Returns:
-            Dict containing extracted tags
+            Dict mapping analysis type to its result
         """
-        # Clean and tokenize text
-        clean_text = re.sub(r"[^\w\s]", " ", text.lower())
-        words = word_tokenize(clean_text)
-
-        # Remove stopwords
-        filtered_words = [
-            word for word in words if word.isalpha() and word not in self.all_stopwords
-        ]
-
-        # Count word frequencies
-        word_counts = Counter(filtered_words)
-
-        # Extract potential tags (most frequent words)
-        tags = [word for word, _ in word_counts.most_common(10)]
-
-        # Also look for hashtags in original text
-        hashtags = re.findall(r"#(\w+)", text)
+        return _analyze_content(content, analysis_types)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Get the worker process pool, created on first use"""
+        if self._pool is None:
+            # Workers are started fresh instead of forking the server process
+            # with its running event loop and open database connections
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
 
-        return {
-            "extracted_tags": tags,
-            "hashtags": hashtags,
-        }
+    def shutdown(self) -> None:
+        """Stop worker processes"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
 
     async def get_post_analysis_result(
         self,
@@ -285,69 +545,63 @@ class PostsAnalyzer:
             return None
 
         # Try to get existing analyses
-        word_freq_analysis = await get_latest_post_analysis(
-            db, post_id, "word_frequency"
-        )
-        text_stats_analysis = await get_latest_post_analysis(db, post_id, "text_stats")
-        tags_analysis = await get_latest_post_analysis(db, post_id, "tags")
-
-        # Check if we need to run analyses
-        if run_if_missing and (
-            not word_freq_analysis or not text_stats_analysis or not tags_analysis
-        ):
-            analysis_types = []
-            if not word_freq_analysis:
-                analysis_types.append("word_frequency")
-            if not text_stats_analysis:
-                analysis_types.append("text_stats")
-            if not tags_analysis:
-                analysis_types.append("tags")
-
+        analyses = await get_latest_post_analyses(db, post_id, ANALYSIS_TYPES)
+
+        # Check if we need to run analyses, analyses of an older version
+        # of the content are run again
+        content_hash = _content_hash(post.content)
+        missing_types = [
+            analysis_type
+            for analysis_type in ANALYSIS_TYPES
+            if analysis_type not in analyses
+            or analyses[analysis_type].content_hash != content_hash
+        ]
+        if run_if_missing and missing_types:
             # Run missing analyses
-            await self._analyze_post(db, post, analysis_types, save_results=True)
+            await self._analyze_post(db, post, missing_types, save_results=True)
 
             # Get updated analyses
-            if not word_freq_analysis:
-                word_freq_analysis = await get_latest_post_analysis(
-                    db, post_id, "word_frequency"
-                )
-            if not text_stats_analysis:
-                text_stats_analysis = await get_latest_post_analysis(
-                    db, post_id, "text_stats"
-                )
-            if not tags_analysis:
-                tags_analysis = await get_latest_post_analysis(db, post_id, "tags")
-
-        # Parse results
+            analyses.update(await get_latest_post_analyses(db, post_id, missing_types))
+
+        return self.build_analysis_result(analyses)
+
+    def build_analysis_result(
+        self, analyses: Dict[str, Optional[PostAnalysis]]
+    ) -> PostAnalysisResult:
+        """
+        Build combined analysis result from stored analyses
+
+        Args:
+            analyses: Latest stored analyses keyed by analysis type
+
+        Returns:
+            Combined analysis result
+        """
+        # Stored results are decoded from JSONB by the driver
+        raw_analysis = {
+            analysis_type: analyses[analysis_type].result
+            for analysis_type in ANALYSIS_TYPES
+            if analyses.get(analysis_type)
+        }
+
         result = PostAnalysisResult()
 
-        if word_freq_analysis:
-            analysis_data = json.loads(word_freq_analysis.result)
+        if "word_frequency" in raw_analysis:
             result.word_frequencies = [
                 WordFrequency(**freq)
-                for freq in analysis_data.get("word_frequencies", [])
+                for freq in raw_analysis["word_frequency"].get("word_frequencies", [])
             ]
 
-        if text_stats_analysis:
-            analysis_data = json.loads(text_stats_analysis.result)
-            result.text_stats = TextStats(**analysis_data)
+        if "text_stats" in raw_analysis:
+            result.text_stats = TextStats(**raw_analysis["text_stats"])
 
-        if tags_analysis:
-            analysis_data = json.loads(tags_analysis.result)
+        if "tags" in raw_analysis:
             result.extracted_tags = ExtractedTags(
-                tags=analysis_data.get("extracted_tags", [])
+                tags=raw_analysis["tags"].get("extracted_tags", [])
             )
 
         # Include raw analysis data
-        result.raw_analysis = {}
-        if word_freq_analysis:
-            result.raw_analysis["word_frequency"] = json.loads(
-                word_freq_analysis.result
-            )
-        if text_stats_analysis:
-            result.raw_analysis["text_stats"] = json.loads(text_stats_analysis.result)
-        if tags_analysis:
-            result.raw_analysis["tags"] = json.loads(tags_analysis.result)
+        result.raw_analysis = raw_analysis
 
         return result
 
@@ -2,11 +2,20 @@ import pytest
 from typing import AsyncGenerator, Generator, Callable
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
 from httpx import AsyncClient, ASGITransport
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.main import app
+from src.services.posts_analyzer import posts_analyzer
 from src.api.dependencies import get_db
+from src.core.cache import (
+    CACHE_PREFIX,
+    CACHE_STATUS_HEADER,
+    init_cache,
+    no_db_key_builder,
+)
 
 
 # Override database dependency for tests
@@ -25,6 +34,8 @@ def override_get_db(db_session: AsyncSession) -> Callable:
 @pytest.fixture
 def test_app(override_get_db: Callable) -> FastAPI:
     """Returns the app with overridden dependencies"""
+    # ASGITransport does not run the lifespan
+    init_cache()
     app.dependency_overrides[get_db] = override_get_db
     return app
 
@@ -37,14 +48,56 @@ def test_client(test_app: FastAPI) -> Generator[TestClient, None, None]:
     app.dependency_overrides.clear()
 
 
-@pytest.fixture
-async def app_client(test_app: FastAPI) -> AsyncGenerator[AsyncClient, None]:
+@pytest.fixture(scope="session")
+async def async_client() -> AsyncGenerator[AsyncClient, None]:
     """
-    Asynchronous test client for FastAPI
+    Asynchronous client shared by the whole test session
     Uses ASGITransport to call the app directly without HTTP
     """
-    transport = ASGITransport(app=test_app)
+    transport = ASGITransport(app=app)
 
     async with AsyncClient(transport=transport, base_url="http://test") as client:
         yield client
+
+    # The lifespan stopping the analyzer is not run either
+    posts_analyzer.shutdown()
+
+
+@pytest.fixture
+async def app_client(
+    async_client: AsyncClient, test_app: FastAPI
+) -> AsyncGenerator[AsyncClient, None]:
+    """
+    Asynchronous test client for FastAPI
+    Reuses the session client, only dependency overrides change between tests
+    """
+    yield async_client
     app.dependency_overrides.clear()
+
+
+@pytest.fixture
+async def cached_client(
+    app_client: AsyncClient,
+) -> AsyncGenerator[AsyncClient, None]:
+    """
+    Asynchronous test client with response caching enabled
+    Responses are cached in memory instead of Redis
+    """
+    backend = InMemoryBackend()
+    await backend.clear(namespace=CACHE_PREFIX)
+    # Initialization is skipped once the cache is initialized
+    FastAPICache.reset()
+    FastAPICache.init(
+        backend,
+        prefix=CACHE_PREFIX,
+        expire=60,
+        key_builder=no_db_key_builder,
+        cache_status_header=CACHE_STATUS_HEADER,
+    )
+
+    yield app_client
+
+    # The in memory store is shared by all backend instances
+    await backend.clear(namespace=CACHE_PREFIX)
+    FastAPICache.reset()
+    init_cache()
@@ -0,0 +1,126 @@
+import hashlib
+
+import pytest
+from httpx import AsyncClient
+
+from src.core.cache import CACHE_STATUS_HEADER, no_db_key_builder
+
+
+@pytest.mark.asyncio
+async def test_get_post_is_cached(cached_client: AsyncClient, posts):
+    """Test that a repeated GET is served from the cache"""
+    url = f"/api/v1/posts/{posts[0].id}"
+
+    response = await cached_client.get(url)
+    assert response.status_code == 200
+    assert response.headers[CACHE_STATUS_HEADER] == "MISS"
+
+    cached_response = await cached_client.get(url)
+    assert cached_response.status_code == 200
+    assert cached_response.headers[CACHE_STATUS_HEADER] == "HIT"
+    assert cached_response.json() == response.json()
+
+    # Clients revalidate instead of keeping entries the server invalidates
+    assert cached_response.headers["Cache-Control"] == "no-cache"
+
+
+@pytest.mark.asyncio
+async def test_revalidate_cached_post(cached_client: AsyncClient, posts):
+    """Test that a revalidation with a matching ETag returns 304"""
+    url = f"/api/v1/posts/{posts[0].id}"
+    response = await cached_client.get(url)
+
+    # The ETag is a digest of the body, the same in every worker process
+    etag = response.headers["ETag"]
+    assert etag == f'W/"{hashlib.md5(response.content).hexdigest()}"'
+
+    response = await cached_client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    response = await cached_client.get(url, headers={"If-None-Match": 'W/"stale"'})
+    assert response.status_code == 200
+    assert response.headers["ETag"] == etag
+
+
+@pytest.mark.asyncio
+async def test_update_post_invalidates_cache(cached_client: AsyncClient, posts):
+    """Test that updating a post drops the cached post and listing"""
+    url = f"/api/v1/posts/{posts[0].id}"
+    other_url = f"/api/v1/posts/{posts[1].id}"
+    for cached_url in (url, other_url, "/api/v1/posts/"):
+        await cached_client.get(cached_url)
+
+    response = await cached_client.put(url, json={"title": "Updated cached post"})
+    assert response.status_code == 200
+
+    response = await cached_client.get(url)
+    assert response.headers[CACHE_STATUS_HEADER] == "MISS"
+    assert response.json()["title"] == "Updated cached post"
+
+    response = await cached_client.get("/api/v1/posts/")
+    assert response.headers[CACHE_STATUS_HEADER] == "MISS"
+
+    # Other posts stay cached
+    response = await cached_client.get(other_url)
+    assert response.headers[CACHE_STATUS_HEADER] == "HIT"
+
+
+@pytest.mark.asyncio
+async def test_delete_post_invalidates_cache(cached_client: AsyncClient, posts):
+    """Test that deleting a post drops the cached post and listing"""
+    url = f"/api/v1/posts/{posts[0].id}"
+    await cached_client.get(url)
+    response = await cached_client.get("/api/v1/posts/")
+    total = response.json()["total"]
+
+    response = await cached_client.delete(url)
+    assert response.status_code == 204
+
+    response = await cached_client.get(url)
+    assert response.status_code == 404
+
+    response = await cached_client.get("/api/v1/posts/")
+    assert response.headers[CACHE_STATUS_HEADER] == "MISS"
+    assert response.json()["total"] == total - 1
+
+
+@pytest.mark.asyncio
+async def test_rename_category_invalidates_cached_posts(
+    cached_client: AsyncClient, posts, categories
+):
+    """Test that renaming a category drops cached posts embedding it"""
+    post = posts[0]
+    url = f"/api/v1/posts/{post.id}"
+    await cached_client.get(url)
+
+    response = await cached_client.put(
+        f"/api/v1/posts/categories/{post.category_id}",
+        json={"name": "Renamed cached category"},
+    )
+    assert response.status_code == 200
+
+    response = await cached_client.get(url)
+    assert response.headers[CACHE_STATUS_HEADER] == "MISS"
+    assert response.json()["category"]["name"] == "Renamed cached category"
+
+
+@pytest.mark.asyncio
+async def test_cache_key_ignores_db_session(cached_client: AsyncClient):
+    """Test that cache keys do not depend on the database session"""
+
+    async def endpoint(post_id: int, db: object) -> None:
+        pass
+
+    keys = [
+        await no_db_key_builder(
+            endpoint, "posts-api:post", kwargs={"post_id": 1, "db": object()}
+        )
+        for _ in range(2)
+    ]
+    assert keys[0] == keys[1]
+
+    other_key = await no_db_key_builder(
+        endpoint, "posts-api:post", kwargs={"post_id": 2, "db": object()}
+    )
+    assert other_key != keys[0]
@@ -89,6 +89,18 @@ async def test_create_category_duplicate_name(app_client: AsyncClient, categorie
     )  # Check that the error message contains the name
 
 
+@pytest.mark.asyncio
+async def test_create_category_duplicate_name_other_case(
+    app_client: AsyncClient, categories
+):
+    """Test that category names differing only in case are duplicates"""
+    category_data = {"name": categories[0].name.lower()}
+
+    response = await app_client.post("/api/v1/posts/categories/", json=category_data)
+
+    assert response.status_code == 400
+
+
 @pytest.mark.asyncio
 async def test_get_nonexistent_category(app_client: AsyncClient):
     """Test retrieving a non-existent category"""
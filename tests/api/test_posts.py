@@ -25,6 +25,26 @@ async def test_create_post(app_client: AsyncClient, categories):
     assert data["category"]["id"] == post_data["category_id"]
 
 
+@pytest.mark.asyncio
+async def test_create_post_with_unknown_category(app_client: AsyncClient, posts):
+    """Test that creating a post in a missing category returns 404"""
+    post_id = posts[0].id
+    post_data = {
+        "title": "Post without category",
+        "content": "Content of a post referencing a category that does not exist.",
+        "category_id": 999999,
+    }
+
+    response = await app_client.post("/api/v1/posts/", json=post_data)
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Category with ID 999999 not found"
+
+    # The failed insert is rolled back, the session keeps working
+    response = await app_client.get(f"/api/v1/posts/{post_id}")
+    assert response.status_code == 200
+
+
 @pytest.mark.asyncio
 async def test_get_post(app_client: AsyncClient, posts):
     """Test retrieving a post by ID via API"""
@@ -63,6 +83,24 @@ async def test_update_post(app_client: AsyncClient, posts):
     )  # Category should remain unchanged
 
 
+@pytest.mark.asyncio
+async def test_update_post_with_unknown_category(app_client: AsyncClient, posts):
+    """Test that moving a post to a missing category returns 404"""
+    post_id, category_id = posts[1].id, posts[1].category_id
+
+    response = await app_client.put(
+        f"/api/v1/posts/{post_id}", json={"category_id": 999999}
+    )
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Category with ID 999999 not found"
+
+    # The failed update is rolled back, the post keeps its category
+    response = await app_client.get(f"/api/v1/posts/{post_id}")
+    assert response.status_code == 200
+    assert response.json()["category_id"] == category_id
+
+
 @pytest.mark.asyncio
 async def test_delete_post(app_client: AsyncClient, posts):
     """Test deleting a post via API"""
@@ -172,6 +210,33 @@ async def test_get_filtered_posts_with_pagination(app_client: AsyncClient, posts
         assert not set(page1_ids).intersection(set(page2_ids))
 
 
+@pytest.mark.asyncio
+async def test_get_filtered_posts_with_cursor(app_client: AsyncClient, posts):
+    """Test keyset pagination of posts via API"""
+    response = await app_client.get("/api/v1/posts/?limit=2")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == len(posts)
+    assert data["next_cursor"] == data["items"][-1]["id"]
+
+    seen_ids = [post["id"] for post in data["items"]]
+    cursor = data["next_cursor"]
+    while cursor is not None:
+        response = await app_client.get(f"/api/v1/posts/?limit=2&cursor={cursor}")
+        assert response.status_code == 200
+        page_data = response.json()
+
+        assert page_data["total"] == len(posts)
+        assert page_data["next_offset"] is None
+        assert all(post["id"] > cursor for post in page_data["items"])
+
+        seen_ids.extend(post["id"] for post in page_data["items"])
+        cursor = page_data["next_cursor"]
+
+    assert seen_ids == sorted(post.id for post in posts)
+
+
 @pytest.mark.asyncio
 async def test_analyze_post(app_client: AsyncClient, posts):
     """Test analyzing a single post via API"""
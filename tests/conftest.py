@@ -5,9 +5,13 @@ import pytest
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.core.database import async_session_maker, init_models, drop_models
+from src.core.database import async_session_maker, engine, init_models, drop_models
+from src.db.models.base import Base
 from src.db.models.posts import Category, Post
 
+# Tables emptied before every test
+TABLES = ", ".join(table.name for table in Base.metadata.sorted_tables)
+
 
 @pytest.fixture(scope="session")
 def event_loop() -> Generator[asyncio.AbstractEventLoop, None, None]:
@@ -19,25 +23,36 @@ def event_loop() -> Generator[asyncio.AbstractEventLoop, None, None]:
     loop.close()
 
 
+@pytest.fixture(scope="session")
+async def db_schema() -> AsyncGenerator[None, None]:
+    """
+    Create the database schema once for the whole test session.
+    """
+    try:
+        await init_models()
+    except Exception as e:
+        pytest.skip(f"Database is not available: {e}")
+
+    yield
+
+    await drop_models()
+
+
 @pytest.fixture(scope="function")
-async def db_session() -> AsyncGenerator[AsyncSession, None]:
+async def db_session(db_schema: None) -> AsyncGenerator[AsyncSession, None]:
     """
-    Create a clean database for each test and clean it up after.
+    Create a session on an empty database for each test.
     """
-    await init_models()
+    # CRUD functions commit and the analyzer workers use sessions of their own,
+    # so tables are emptied instead of rolling back a per-test transaction
+    async with engine.begin() as conn:
+        await conn.execute(text(f"TRUNCATE {TABLES} RESTART IDENTITY CASCADE"))
 
     async with async_session_maker() as session:
-        try:
-            await session.execute(text("SELECT 1"))
-        except Exception as e:
-            pytest.skip(f"Database is not available: {e}")
-
         yield session
 
         await session.rollback()
 
-    await drop_models()
-
 
 @pytest.fixture
 async def categories(db_session: AsyncSession) -> list[Category]:
@@ -50,12 +65,11 @@ async def categories(db_session: AsyncSession) -> list[Category]:
         Category(name="Health", description="Healthy lifestyle articles"),
     ]
 
+    # Primary keys and server defaults come back with the INSERT, and the
+    # session does not expire them on commit, so no refresh is needed
     db_session.add_all(categories_data)
     await db_session.commit()
 
-    for category in categories_data:
-        await db_session.refresh(category)
-
     return categories_data
 
 
@@ -95,7 +109,4 @@ async def posts(db_session: AsyncSession, categories: list[Category]) -> list[Po
     db_session.add_all(posts_data)
     await db_session.commit()
 
-    for post in posts_data:
-        await db_session.refresh(post)
-
     return posts_data
@@ -1,6 +1,13 @@
+from contextlib import contextmanager
+from typing import Iterator, List
+
 import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.core.database import engine
+
 from src.db.crud.posts import (
     create_category,
     get_category,
@@ -12,9 +19,13 @@ from src.db.crud.posts import (
     update_post,
     delete_post,
     get_filtered_posts,
+    stream_filtered_posts,
     create_post_analysis,
+    create_post_analyses_bulk,
     get_post_analyses,
     get_latest_post_analysis,
+    get_latest_post_analyses,
+    get_latest_analyses_bulk,
 )
 from src.schemas.posts import (
     CategoryCreate,
@@ -26,6 +37,21 @@ from src.schemas.posts import (
 )
 
 
+@contextmanager
+def count_queries() -> Iterator[List[str]]:
+    """Collect SQL statements executed by the engine inside the block"""
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count_statement)
+
+
 # Category tests
 @pytest.mark.asyncio
 async def test_create_category(db_session: AsyncSession):
@@ -60,6 +86,15 @@ async def test_get_category_by_name(db_session: AsyncSession, categories):
     assert category.name == categories[1].name
 
 
+@pytest.mark.asyncio
+async def test_get_category_by_name_ignores_case(db_session: AsyncSession, categories):
+    """Test that category names are looked up regardless of case"""
+    category = await get_category_by_name(db_session, categories[1].name.upper())
+
+    assert category is not None
+    assert category.id == categories[1].id
+
+
 @pytest.mark.asyncio
 async def test_update_category(db_session: AsyncSession, categories):
     """Test updating a category"""
@@ -158,10 +193,21 @@ async def test_get_filtered_posts_by_category(
     assert all(post.category_id == categories[1].id for post in filtered_posts)
 
     filter_params = PostFilterParams(category_name=categories[0].name)
-    filtered_posts, count = await get_filtered_posts(db_session, filter_params)
+    with count_queries() as statements:
+        filtered_posts, count = await get_filtered_posts(db_session, filter_params)
+        category_names = [post.category.name for post in filtered_posts]
 
     assert count > 0
-    assert all(post.category.name == categories[0].name for post in filtered_posts)
+    assert all(name == categories[0].name for name in category_names)
+    assert len(statements) <= 2
+
+    # Without categories the relationship raises instead of lazy loading
+    db_session.expunge_all()
+    filtered_posts, _ = await get_filtered_posts(
+        db_session, filter_params, load_category=False
+    )
+    with pytest.raises(InvalidRequestError):
+        _ = filtered_posts[0].category
 
 
 @pytest.mark.asyncio
@@ -200,6 +246,37 @@ async def test_get_filtered_posts_by_search(db_session: AsyncSession, posts):
     assert count >= 0
 
 
+@pytest.mark.asyncio
+async def test_get_filtered_posts_fulltext_matches_tokens(
+    db_session: AsyncSession, posts, categories
+):
+    """Test that full-text search matches word stems instead of substrings"""
+    post = await create_post(
+        db_session,
+        PostCreate(
+            title="Новые технологии",
+            content="Обзор технологии машинного обучения",
+            category_id=categories[1].id,
+        ),
+    )
+
+    # Another form of the same word shares its stem
+    filter_params = PostFilterParams(search_query="технология", use_fulltext=True)
+    filtered_posts, count = await get_filtered_posts(db_session, filter_params)
+
+    assert count == 1
+    assert filtered_posts[0].id == post.id
+
+    # Part of a word is not a token, only the substring search matches it
+    filter_params = PostFilterParams(search_query="echnolog", use_fulltext=True)
+    _, count = await get_filtered_posts(db_session, filter_params)
+    assert count == 0
+
+    filter_params = PostFilterParams(search_query="echnolog", use_fulltext=False)
+    _, count = await get_filtered_posts(db_session, filter_params)
+    assert count > 0
+
+
 @pytest.mark.asyncio
 async def test_get_filtered_posts_with_pagination(db_session: AsyncSession, posts):
     """Test pagination when filtering posts"""
@@ -214,10 +291,77 @@ async def test_get_filtered_posts_with_pagination(db_session: AsyncSession, post
         second_page, _ = await get_filtered_posts(db_session, filter_params)
 
         assert len(second_page) <= 2
-        assert all(
-            first.id != second.id for first in first_page for second in second_page
+        first_ids = {post.id for post in first_page}
+        assert first_ids.isdisjoint(post.id for post in second_page)
+
+
+@pytest.mark.asyncio
+async def test_get_filtered_posts_total(db_session: AsyncSession, posts):
+    """Test that the total count is returned with the page"""
+    with count_queries() as statements:
+        page, total = await get_filtered_posts(
+            db_session, PostFilterParams(limit=2, offset=1), load_category=False
         )
 
+    assert len(page) == 2
+    assert total == len(posts)
+    # The total is a window column of the page query
+    assert len(statements) == 1
+
+    # No rows carry the total past the last post, it is counted separately
+    page, total = await get_filtered_posts(
+        db_session, PostFilterParams(limit=2, offset=len(posts))
+    )
+    assert page == []
+    assert total == len(posts)
+
+
+@pytest.mark.asyncio
+async def test_get_filtered_posts_query_count(db_session: AsyncSession, posts):
+    """Test that posts and their categories are loaded without N+1 queries"""
+    db_session.expunge_all()
+
+    with count_queries() as statements:
+        filtered_posts, total = await get_filtered_posts(
+            db_session, PostFilterParams(limit=100)
+        )
+        category_names = [post.category.name for post in filtered_posts]
+
+    assert total == len(posts)
+    assert len(category_names) == len(posts)
+    # One query for the page and one for the categories
+    assert len(statements) == 2
+
+
+@pytest.mark.asyncio
+async def test_stream_filtered_posts(db_session: AsyncSession, posts):
+    """Test streaming filtered posts in batches"""
+    filter_params = PostFilterParams(limit=4, offset=1)
+    batches = [
+        batch async for batch in stream_filtered_posts(db_session, filter_params, 2)
+    ]
+
+    assert [len(batch) for batch in batches] == [2, 2]
+    # Only the columns needed by the analysis are selected
+    assert batches[0][0]._fields == ("id", "content")
+    assert [post.id for batch in batches for post in batch] == sorted(
+        post.id for post in posts
+    )[1:5]
+
+
+@pytest.mark.asyncio
+async def test_get_post_raises_on_unloaded_relationship(
+    db_session: AsyncSession, posts
+):
+    """Test that relationships which are not eagerly loaded are not lazy loaded"""
+    db_session.expunge_all()
+
+    post = await get_post(db_session, posts[0].id)
+    assert post.category is not None
+
+    with pytest.raises(InvalidRequestError):
+        _ = post.analyses
+
 
 # Post analysis tests
 @pytest.mark.asyncio
@@ -228,7 +372,7 @@ async def test_post_analysis_operations(db_session: AsyncSession, posts):
     analysis_in = PostAnalysisCreate(
         post_id=post_id,
         analysis_type="word_frequency",
-        result='{"top_words": ["test", "analysis"]}',
+        result={"top_words": ["test", "analysis"]},
     )
 
     analysis = await create_post_analysis(db_session, analysis_in)
@@ -251,3 +395,88 @@ async def test_post_analysis_operations(db_session: AsyncSession, posts):
     assert latest_analysis is not None
     assert latest_analysis.post_id == post_id
     assert latest_analysis.analysis_type == "word_frequency"
+
+
+@pytest.mark.asyncio
+async def test_create_post_analysis_without_refresh(db_session: AsyncSession, posts):
+    """Test that a created analysis is usable without reloading it"""
+    analysis_in = PostAnalysisCreate(
+        post_id=posts[0].id, analysis_type="tags", result={"extracted_tags": []}
+    )
+
+    with count_queries() as statements:
+        analysis = await create_post_analysis(db_session, analysis_in)
+        assert analysis.id is not None
+        assert analysis.created_at is not None
+
+    # Only the INSERT, its generated values are returned by the statement
+    assert not any(
+        statement.lstrip().upper().startswith("SELECT") for statement in statements
+    )
+
+
+@pytest.mark.asyncio
+async def test_create_post_analyses_bulk(db_session: AsyncSession, posts):
+    """Test creating several analyses of a post at once"""
+    post_id = posts[0].id
+    analysis_types = ["word_frequency", "text_stats", "tags"]
+
+    await create_post_analyses_bulk(
+        db_session,
+        [
+            PostAnalysisCreate(post_id=post_id, analysis_type=analysis_type, result={})
+            for analysis_type in analysis_types
+        ],
+    )
+
+    analyses = await get_post_analyses(db_session, post_id)
+    assert sorted(analysis.analysis_type for analysis in analyses) == sorted(
+        analysis_types
+    )
+    assert all(analysis.created_at is not None for analysis in analyses)
+
+
+@pytest.mark.asyncio
+async def test_get_latest_post_analyses(db_session: AsyncSession, posts):
+    """Test fetching latest analyses of several types for a post at once"""
+    post_id = posts[0].id
+    for result in ({"version": 1}, {"version": 2}):
+        for analysis_type in ("text_stats", "tags"):
+            await create_post_analysis(
+                db_session,
+                PostAnalysisCreate(
+                    post_id=post_id, analysis_type=analysis_type, result=result
+                ),
+            )
+
+    latest = await get_latest_post_analyses(
+        db_session, post_id, ["word_frequency", "text_stats", "tags"]
+    )
+
+    assert set(latest) == {"text_stats", "tags"}
+    assert all(analysis.result == {"version": 2} for analysis in latest.values())
+
+
+@pytest.mark.asyncio
+async def test_get_latest_analyses_bulk(db_session: AsyncSession, posts):
+    """Test fetching latest analyses of several posts at once"""
+    for post in posts[:2]:
+        for result in ({"version": 1}, {"version": 2}):
+            await create_post_analysis(
+                db_session,
+                PostAnalysisCreate(
+                    post_id=post.id, analysis_type="text_stats", result=result
+                ),
+            )
+
+    post_ids = [post.id for post in posts]
+    latest = await get_latest_analyses_bulk(
+        db_session, post_ids, ["text_stats", "tags"]
+    )
+
+    assert set(latest) == {posts[0].id, posts[1].id}
+    for post in posts[:2]:
+        assert set(latest[post.id]) == {"text_stats"}
+        assert latest[post.id]["text_stats"].result == {"version": 2}
+
+    assert await get_latest_analyses_bulk(db_session, [], ["text_stats"]) == {}
@@ -3,6 +3,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from src.db.crud.posts import get_category_with_posts, get_post
 from src.db.models.posts import Category, Post, PostAnalysis
 
 
@@ -76,7 +77,7 @@ async def test_post_analysis_model(db_session: AsyncSession):
     post_analysis = PostAnalysis(
         post_id=post.id,
         analysis_type="text_stats",
-        result='{"word_count": 5, "char_count": 30, "sentence_count": 1}',
+        result={"word_count": 5, "char_count": 30, "sentence_count": 1},
     )
     db_session.add(post_analysis)
     await db_session.commit()
@@ -97,17 +98,17 @@ async def test_post_analysis_model(db_session: AsyncSession):
 @pytest.mark.asyncio
 async def test_relationships(db_session: AsyncSession, categories, posts):
     """Test relationships between models"""
-    category = await db_session.get(Category, categories[0].id)
+    db_session.expunge_all()
+
+    category = await get_category_with_posts(db_session, categories[0].id)
     assert category is not None
 
-    await db_session.refresh(category, ["posts"])
     assert len(category.posts) > 0
     for post in category.posts:
         assert post.category_id == category.id
 
-    post = await db_session.get(Post, posts[0].id)
+    post = await get_post(db_session, posts[0].id)
     assert post is not None
 
-    await db_session.refresh(post, ["category"])
     assert post.category is not None
     assert post.category.id == post.category_id
@@ -0,0 +1,16 @@
+import pytest
+from typing import Generator
+
+from src.services.posts_analyzer import PostsAnalyzer
+
+
+@pytest.fixture
+def analyzer(request: pytest.FixtureRequest) -> Generator[PostsAnalyzer, None, None]:
+    """
+    Analyzer stopping its worker processes after the test
+    Sized by an indirect (batch_size, max_workers) parameter, (2, 2) by default
+    """
+    batch_size, max_workers = getattr(request, "param", (2, 2))
+    analyzer = PostsAnalyzer(batch_size=batch_size, max_workers=max_workers)
+    yield analyzer
+    analyzer.shutdown()
@@ -2,19 +2,26 @@
 Tests for the post analysis service
 """
 
-import json
+import asyncio
+
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.services import posts_analyzer as posts_analyzer_module
 from src.services.posts_analyzer import PostsAnalyzer
-from src.schemas.posts import PostFilterParams
-from src.db.crud.posts import get_latest_post_analysis
+from src.schemas.posts import PostFilterParams, PostUpdate
+from src.db.crud.posts import (
+    get_latest_analyses_bulk,
+    get_latest_post_analysis,
+    update_post,
+)
 
 
 @pytest.mark.asyncio
-async def test_word_frequency_analysis(db_session: AsyncSession, posts):
+async def test_word_frequency_analysis(
+    db_session: AsyncSession, posts, analyzer: PostsAnalyzer
+):
     """Test word frequency analysis"""
-    analyzer = PostsAnalyzer(batch_size=2, max_workers=2)
 
     post = posts[0]
     result = analyzer._analyze_word_frequency(post.content)
@@ -36,9 +43,10 @@ async def test_word_frequency_analysis(db_session: AsyncSession, posts):
 
 
 @pytest.mark.asyncio
-async def test_text_stats_analysis(db_session: AsyncSession, posts):
+async def test_text_stats_analysis(
+    db_session: AsyncSession, posts, analyzer: PostsAnalyzer
+):
     """Test text statistics analysis"""
-    analyzer = PostsAnalyzer(batch_size=2, max_workers=2)
 
     post = posts[0]
     result = analyzer._analyze_text_stats(post.content)
@@ -60,11 +68,44 @@ async def test_text_stats_analysis(db_session: AsyncSession, posts):
     assert result["sentence_count"] > 0
 
 
+def test_text_stats_tokenization(analyzer: PostsAnalyzer):
+    """Test word and sentence tokenization of text statistics"""
+    result = analyzer._analyze_text_stats(
+        "Hello, world! Second sentence here... 42 is not a_word"
+    )
+
+    assert result["word_count"] == 9
+    assert result["sentence_count"] == 3
+
+
+def test_tokenize_is_shared_between_analyses():
+    """Test that analyses of the same text reuse one tokenization"""
+    text = "Shared tokenization of the same text"
+    cache_info_before = posts_analyzer_module._tokenize.cache_info()
+
+    posts_analyzer_module._analyze_word_frequency(text)
+    posts_analyzer_module._analyze_text_stats(text)
+    posts_analyzer_module._extract_tags(text)
+
+    cache_info = posts_analyzer_module._tokenize.cache_info()
+    assert cache_info.misses - cache_info_before.misses == 1
+    assert cache_info.hits - cache_info_before.hits == 2
+
+
+def test_stopwords_are_loaded_on_first_use():
+    """Test that stopwords are not read when the analyzer is created"""
+    posts_analyzer_module._all_stopwords.cache_clear()
+    PostsAnalyzer(batch_size=2, max_workers=2)
+    assert posts_analyzer_module._all_stopwords.cache_info().currsize == 0
+
+    posts_analyzer_module._tokenize("Stopwords are loaded now")
+
+    assert posts_analyzer_module._all_stopwords.cache_info().currsize == 1
+
+
 @pytest.mark.asyncio
-async def test_extract_tags(db_session: AsyncSession, posts):
+async def test_extract_tags(db_session: AsyncSession, posts, analyzer: PostsAnalyzer):
     """Test tag extraction from text"""
-    analyzer = PostsAnalyzer(batch_size=2, max_workers=2)
-
     post = posts[0]
     result = analyzer._extract_tags(post.content)
 
@@ -79,10 +120,8 @@ async def test_extract_tags(db_session: AsyncSession, posts):
 
 
 @pytest.mark.asyncio
-async def test_analyze_post(db_session: AsyncSession, posts):
+async def test_analyze_post(db_session: AsyncSession, posts, analyzer: PostsAnalyzer):
     """Test full post analysis"""
-    analyzer = PostsAnalyzer(batch_size=2, max_workers=2)
-
     post = posts[0]
     analysis_types = ["word_frequency", "text_stats", "tags"]
     result = await analyzer._analyze_post(
@@ -101,14 +140,14 @@ async def test_analyze_post(db_session: AsyncSession, posts):
         assert analysis.analysis_type == analysis_type
         assert analysis.post_id == post.id
 
-        parsed_result = json.loads(analysis.result)
-        assert isinstance(parsed_result, dict)
+        assert isinstance(analysis.result, dict)
 
 
 @pytest.mark.asyncio
-async def test_get_post_analysis_result(db_session: AsyncSession, posts):
+async def test_get_post_analysis_result(
+    db_session: AsyncSession, posts, analyzer: PostsAnalyzer
+):
     """Test retrieving post analysis results"""
-    analyzer = PostsAnalyzer(batch_size=2, max_workers=2)
 
     post = posts[0]
     analysis_result = await analyzer.get_post_analysis_result(
@@ -137,9 +176,10 @@ async def test_get_post_analysis_result(db_session: AsyncSession, posts):
 
 
 @pytest.mark.asyncio
-async def test_analyze_filtered_posts(db_session: AsyncSession, posts):
+async def test_analyze_filtered_posts(
+    db_session: AsyncSession, posts, analyzer: PostsAnalyzer
+):
     """Test analysis of filtered posts"""
-    analyzer = PostsAnalyzer(batch_size=2, max_workers=2)
 
     filters = PostFilterParams(limit=10, offset=0)
     results, metadata = await analyzer.analyze_filtered_posts(
@@ -163,12 +203,109 @@ async def test_analyze_filtered_posts(db_session: AsyncSession, posts):
         assert "text_stats" in result["analyses"]
 
 
+@pytest.mark.asyncio
+async def test_analyze_filtered_posts_saves_batches(
+    db_session: AsyncSession, posts, monkeypatch, analyzer: PostsAnalyzer
+):
+    """Test that analyses are saved with one insert per batch"""
+    saved_batches = []
+    create_post_analyses_bulk = posts_analyzer_module.create_post_analyses_bulk
+
+    async def save_batch(db, analyses_in):
+        saved_batches.append(analyses_in)
+        await create_post_analyses_bulk(db, analyses_in)
+
+    monkeypatch.setattr(posts_analyzer_module, "create_post_analyses_bulk", save_batch)
+
+    analysis_types = ["word_frequency", "text_stats"]
+    await analyzer.analyze_filtered_posts(
+        db_session, PostFilterParams(limit=10, offset=0), analysis_types
+    )
+
+    # Five posts are split into batches of two
+    assert sorted(len(batch) for batch in saved_batches) == [2, 4, 4]
+
+    latest_analyses = await get_latest_analyses_bulk(
+        db_session, [post.id for post in posts], analysis_types
+    )
+    assert all(set(latest_analyses[post.id]) == set(analysis_types) for post in posts)
+
+
+@pytest.mark.asyncio
+async def test_analyze_filtered_posts_reuses_unchanged_content(
+    db_session: AsyncSession, posts, monkeypatch, analyzer: PostsAnalyzer
+):
+    """Test that only posts with changed content are analyzed again"""
+    filters = PostFilterParams(limit=10, offset=0)
+    analysis_types = ["word_frequency", "text_stats"]
+    first_results, _ = await analyzer.analyze_filtered_posts(
+        db_session, filters, analysis_types
+    )
+
+    saved_analyses = []
+    create_post_analyses_bulk = posts_analyzer_module.create_post_analyses_bulk
+
+    async def save_batch(db, analyses_in):
+        saved_analyses.extend(analyses_in)
+        await create_post_analyses_bulk(db, analyses_in)
+
+    monkeypatch.setattr(posts_analyzer_module, "create_post_analyses_bulk", save_batch)
+
+    # Stored results are returned for unchanged posts
+    results, _ = await analyzer.analyze_filtered_posts(
+        db_session, filters, analysis_types
+    )
+    assert results == first_results
+    assert saved_analyses == []
+
+    post = posts[0]
+    await update_post(db_session, post.id, PostUpdate(content="Brand new content."))
+
+    results, _ = await analyzer.analyze_filtered_posts(
+        db_session, filters, analysis_types
+    )
+    assert {analysis.post_id for analysis in saved_analyses} == {post.id}
+    assert results[0]["analyses"]["text_stats"]["word_count"] == 3
+
+
+@pytest.mark.parametrize("analyzer", [(1, 1)], indirect=True)
+@pytest.mark.asyncio
+async def test_analyze_filtered_posts_bounds_fetched_batches(
+    db_session: AsyncSession, posts, monkeypatch, analyzer: PostsAnalyzer
+):
+    """Test that posts are not fetched far ahead of the analysis"""
+    stream_filtered_posts = posts_analyzer_module.stream_filtered_posts
+    fetched_batches = []
+    fetched_before_analysis = []
+
+    async def stream(db, filters, batch_size):
+        async for batch in stream_filtered_posts(db, filters, batch_size):
+            fetched_batches.append(batch)
+            yield batch
+
+    async def analyze_batch(db, batch, analysis_types, save_results):
+        # Give the producer a chance to run ahead
+        await asyncio.sleep(0.01)
+        fetched_before_analysis.append(len(fetched_batches))
+        return [{"post_id": post.id, "analyses": {}} for post in batch]
+
+    monkeypatch.setattr(posts_analyzer_module, "stream_filtered_posts", stream)
+    monkeypatch.setattr(analyzer, "_analyze_batch", analyze_batch)
+
+    results, _ = await analyzer.analyze_filtered_posts(
+        db_session, PostFilterParams(limit=10, offset=0), save_results=False
+    )
+
+    assert [result["post_id"] for result in results] == [post.id for post in posts]
+    # At most one batch in analysis, two queued and one waiting to be queued
+    assert fetched_before_analysis[0] <= 4
+
+
 @pytest.mark.asyncio
 async def test_analyze_filtered_posts_with_category_filter(
-    db_session: AsyncSession, posts, categories
+    db_session: AsyncSession, posts, categories, analyzer: PostsAnalyzer
 ):
     """Test analysis of posts with category filter"""
-    analyzer = PostsAnalyzer(batch_size=2, max_workers=2)
 
     category = categories[0]
     filters = PostFilterParams(limit=10, offset=0, category_id=category.id)
@@ -191,10 +328,9 @@ async def test_analyze_filtered_posts_with_category_filter(
 
 @pytest.mark.asyncio
 async def test_analyze_filtered_posts_with_search_filter(
-    db_session: AsyncSession, posts
+    db_session: AsyncSession, posts, analyzer: PostsAnalyzer
 ):
     """Test analysis of posts with search query filter"""
-    analyzer = PostsAnalyzer(batch_size=2, max_workers=2)
 
     search_term = "технологии"
 
@@ -217,3 +353,28 @@ async def test_analyze_filtered_posts_with_search_filter(
 
         assert "analyses" in result
         assert "tags" in result["analyses"]
+
+
+@pytest.mark.parametrize("analyzer", [(1, 2)], indirect=True)
+@pytest.mark.asyncio
+async def test_analyze_filtered_posts_stops_on_failure(
+    db_session: AsyncSession, posts, monkeypatch, analyzer: PostsAnalyzer
+):
+    """Test that a failing batch cancels the remaining analysis"""
+    calls = []
+
+    async def analyze_batch(db, batch, analysis_types, save_results):
+        calls.append(batch)
+        if len(calls) == 1:
+            raise RuntimeError("Analysis failed")
+        await asyncio.sleep(1)
+        return []
+
+    monkeypatch.setattr(analyzer, "_analyze_batch", analyze_batch)
+
+    with pytest.raises(RuntimeError, match="Analysis failed"):
+        await analyzer.analyze_filtered_posts(
+            db_session, PostFilterParams(limit=10, offset=0), save_results=False
+        )
+
+    assert len(calls) < len(posts)